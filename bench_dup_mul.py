@@ -0,0 +1,57 @@
+"""
+    Benchmark of the dense multiplication kernels of sffdensetools.
+    Prints the time of one product of two random polynomials of each length
+    by every kernel and the length from which Karatsuba and Kronecker
+    substitution beat the classical product at every longer length, per domain.
+    dup_mul takes Kronecker substitution whenever the domain has at most one
+    relation, so KARATSUBA_THRESHOLD follows the domains of several relations.
+
+    python bench_dup_mul.py [max length]
+"""
+import random
+import sys
+import timeit
+
+from sympy.core.symbol import symbols
+
+from sffdomains import sff
+from sffdensetools import dup_mul_classical, dup_mul_karatsuba, dup_mul_kronecker, dup_random
+
+LENGTHS = [2, 4, 8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512]
+
+def _domains():
+    a, b = symbols('a b')
+    return [sff(0, 2), sff(0, 101), sff(a ** 2 + 2, 5), sff(a ** 3 + a + 1, 5),
+            sff(a ** 5 + 2 * a + 1, 3), sff([a ** 2 + 2, b ** 3 + b + 1], 5),
+            sff([a ** 2 + a + 1, b ** 3 + b + 1], 2), sff([a ** 2 + 3, b ** 3 + 2], 7)]
+
+def _time(func, f, g, dom):
+    timer = timeit.Timer(lambda: func(f, g, dom))
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number
+
+def bench(dom, lengths):
+    _kernels = [('classical', dup_mul_classical), ('karatsuba', dup_mul_karatsuba)]
+    if len(dom.degs) <= 1:
+        _kernels.append(('kronecker', dup_mul_kronecker))
+    print(dom.as_SFF())
+    print("%8s" % 'length' + ''.join("%12s" % name for name, _ in _kernels))
+    _crossover = {}
+    for n in lengths:
+        f, g = dup_random(n, dom), dup_random(n, dom)
+        _times = [_time(func, f, g, dom) for _, func in _kernels]
+        print("%8d" % n + ''.join("%12.2e" % t for t in _times))
+        for (name, _), t in zip(_kernels[1:], _times[1:]):
+            if t < _times[0]:
+                _crossover.setdefault(name, n)
+            else:
+                _crossover.pop(name, None)
+    for name, _ in _kernels[1:]:
+        print("%s beats classical from length %s" % (name, _crossover.get(name, '-')))
+    print()
+
+if __name__ == '__main__':
+    random.seed(0)
+    _max = int(sys.argv[1]) if len(sys.argv) > 1 else LENGTHS[-1]
+    for dom in _domains():
+        bench(dom, [n for n in LENGTHS if n <= _max])
@@ -1,33 +1,114 @@
 '''
-	https://stackoverflow.com/questions/6974695/python-process-pool-non-daemonic
-	recently accessed: 20200923
+	Shared worker pool.
+	The pool is created at the first dispatch and reused by every operation
+	until close_pool() or the interpreter exits.
+	Work whose estimated size is below the threshold stays in-process,
+	and so does all work requested from inside a worker.
 '''
-
+from contextlib import contextmanager
+from itertools import starmap
+import atexit
 import multiprocessing
-import multiprocessing.pool
+import os
+import queue
+
+from profiletools import span
+
+_pool = None
+_pool_processes = os.cpu_count()
+_pool_threshold = 10 ** 5
+_in_worker = False
+
+def _init_worker():
+	global _in_worker
+	_in_worker = True
+
+def set_pool(processes=None, threshold=None):
+	"""
+	configure the shared pool:
+		* processes: number of worker processes, 1 keeps all work in-process
+		* threshold: minimal estimated size of work sent to the pool
+	a running pool is closed if its size changes
+	"""
+	global _pool_processes, _pool_threshold
+	if processes is not None:
+		if processes < 1:
+			raise ValueError("number of processes needs to be positive, not %s" % processes)
+		if not processes == _pool_processes:
+			close_pool()
+			_pool_processes = processes
+	if threshold is not None:
+		_pool_threshold = threshold
 
-class NoDaemonProcess(multiprocessing.Process):
-	def _get_daemon(self):
-		return False
-	def _set_daemon(self, value):
-		pass
-	daemon = property(_get_daemon, _set_daemon)
+@contextmanager
+def pool_settings(processes=None, threshold=None):
+	""" set_pool(processes, threshold) in its block, the previous settings after it """
+	_saved = _pool_processes, _pool_threshold
+	set_pool(processes, threshold)
+	try:
+		yield
+	finally:
+		set_pool(*_saved)
 
-class SFFPool(multiprocessing.pool.Pool):
-	Process = NoDaemonProcess
+def get_pool():
+	global _pool
+	if _pool is None:
+		_pool = multiprocessing.Pool(_pool_processes, initializer=_init_worker)
+	return _pool
 
-# def test():
-#     print("Creating 5 (non-daemon) workers and jobs in main process.")
-#     pool = MyPool(5)
+def close_pool():
+	global _pool
+	if _pool is not None:
+		_pool.terminate()
+		_pool.join()
+		_pool = None
 
-#     result = pool.map(work, [randint(1, 5) for x in range(5)])
+atexit.register(close_pool)
 
-#     pool.close()
-#     pool.join()
-#     print(result)
+def use_pool(size):
+	""" True if work of the estimated size is worth dispatching """
+	return not _in_worker and _pool_processes > 1 and size >= _pool_threshold
 
-# if __name__ == '__main__':
-#     test()
+def pool_starmap(func, iterable, size, chunksize=None):
+	"""
+	starmap over the shared pool, or in-process when use_pool(size) is False
+	"""
+	if not use_pool(size):
+		return list(starmap(func, iterable))
+	with span('pool_starmap'):
+		return get_pool().starmap(func, iterable, chunksize)
 
-class StopEval(Exception):
-	pass
\ No newline at end of file
+def pool_stream(func, iterable, size, window=None):
+	"""
+	yields func(*args) for args in iterable in order of completion.
+	At most window tasks (twice the pool size by default) are in flight,
+	and no more tasks are submitted once the consumer stops iterating.
+	The span pool_stream times the first submissions and each wait for a
+	result with the submission that follows it, not the consumer's work.
+	"""
+	if not use_pool(size):
+		for args in iterable:
+			yield func(*args)
+		return
+	pool = get_pool()
+	window = window or 2 * _pool_processes
+	done = queue.Queue()
+	tasks = iter(iterable)
+	pending = 0
+	def _submit():
+		args = next(tasks, None)
+		if args is None:
+			return 0
+		pool.apply_async(func, args, callback=lambda r: done.put((True, r)), error_callback=lambda e: done.put((False, e)))
+		return 1
+	with span('pool_stream'):
+		while pending < window and _submit():
+			pending += 1
+	while pending:
+		with span('pool_stream'):
+			ok, result = done.get()
+			pending -= 1
+			if not ok:
+				raise result
+			pending += _submit()
+		yield result
@@ -0,0 +1,125 @@
+"""
+	Instrumentation of the computations: named spans around phases and
+	counted functions, both summing up calls and seconds in a Stats object.
+	It is disabled by default, when a span or a counted call costs one flag test.
+	Work done in worker processes of the shared pool is not counted.
+"""
+from contextlib import contextmanager
+from functools import wraps
+import json
+import time
+
+class Stats:
+	"""
+		calls and cumulative seconds by name
+	"""
+
+	def __init__(self):
+		self.calls = {}
+		self.seconds = {}
+
+	def __repr__(self):
+		return "Stats(%s)" % self.as_dict()
+
+	def add(self, name, seconds):
+		self.calls[name] = self.calls.get(name, 0) + 1
+		self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+	def merge(self, other):
+		for name in other.calls:
+			self.calls[name] = self.calls.get(name, 0) + other.calls[name]
+			self.seconds[name] = self.seconds.get(name, 0.0) + other.seconds[name]
+
+	def clear(self):
+		self.calls.clear()
+		self.seconds.clear()
+
+	def as_dict(self):
+		""" {name: {'calls': n, 'seconds': t}} sorted by decreasing time """
+		_names = sorted(self.calls, key=lambda name: -self.seconds[name])
+		return dict((name, {'calls': self.calls[name], 'seconds': self.seconds[name]}) for name in _names)
+
+	def to_json(self, **kwargs):
+		return json.dumps(self.as_dict(), **kwargs)
+
+	def dump(self, fp, **kwargs):
+		json.dump(self.as_dict(), fp, **kwargs)
+
+_enabled = False
+_stats = Stats()
+
+def enable(flag=True):
+	global _enabled
+	_enabled = flag
+
+def is_enabled():
+	return _enabled
+
+def get_stats():
+	return _stats
+
+def reset_stats():
+	_stats.clear()
+
+@contextmanager
+def profile():
+	"""
+	enables the instrumentation in its block and yields
+	the Stats of the work done there
+	"""
+	global _enabled, _stats
+	_saved = _enabled, _stats
+	_enabled, _stats = True, Stats()
+	try:
+		yield _stats
+	finally:
+		_inner = _stats
+		_enabled, _stats = _saved
+		if _enabled:
+			_stats.merge(_inner)
+
+class _Span:
+	__slots__ = ('name', 'start')
+
+	def __init__(self, name):
+		self.name = name
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc):
+		_stats.add(self.name, time.perf_counter() - self.start)
+		return False
+
+class _NullSpan:
+	__slots__ = ()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		return False
+
+_null_span = _NullSpan()
+
+def span(name):
+	""" context manager adding the time of its block to name """
+	if not _enabled:
+		return _null_span
+	return _Span(name)
+
+def counted(name):
+	""" decorator adding the calls and time of a function to name """
+	def decorator(func):
+		@wraps(func)
+		def wrapper(*args, **kwargs):
+			if not _enabled:
+				return func(*args, **kwargs)
+			start = time.perf_counter()
+			try:
+				return func(*args, **kwargs)
+			finally:
+				_stats.add(name, time.perf_counter() - start)
+		return wrapper
+	return decorator
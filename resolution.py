@@ -4,19 +4,50 @@
 	We will at first implemtent the outline of the Algorithm S-M* without any validation.
 
 '''
+from functools import reduce
 from itertools import product
-import time
+from math import gcd
 
-from sympy.core.expr import Expr
 from sympy.core.function import diff
 from sympy.core.symbol import symbols
-from sympy.polys.polytools import Poly, poly, resultant, factor_list
+from sympy.ntheory.generate import primerange
+from sympy.polys.polytools import Poly, poly, factor_list, resultant
 
-from sffpolytools import sffpoly, reduce
-from sffdomains import sff
+from sffpolytools import sffpoly, SFFPoly
+from sffdomains import cached_sff, LRUCache, DOMAIN_CACHE_SIZE
+from sfffacttools import sffgcd, sfffactor_list, sffresultant
+from sffbivartools import sffbivariate, SFFBivariatePoly
+from sffdensetools import dup_factor_list, dup_roots, dup_strip
+from sffelements import SFFElement
+from multiprocessingtools import pool_settings, pool_stream
+from profiletools import counted, span
 
-def sing(f):
-	start = time.time()
+"""
+	Estimated size of the work of one curve for the shared pool (see use_pool).
+"""
+SING_SIZE = 10 ** 5
+
+@counted('sing')
+def sing(f, search='gcd', resultants=None):
+	"""
+	singular points of a plane curve f over the splitting field
+	of the resultants of f with its partial derivatives.
+	search='gcd' takes for one x-root of each Frobenius orbit the y-roots of
+	gcd(f, f_x, f_y) at that x-root, search='pairs' tests every pair of roots.
+	resultants may give (res_y(f, f_x), res_x(f, f_y)) as sffpolys over FF(mod)
+	computed before; an entry None is computed here.
+	A resultant that vanishes identically is replaced by the one of f with
+	f_x + c * f_y (see _eliminant), and a curve whose resultants all vanish,
+	i.e. with a multiple component, raises a ValueError.
+	The phases are recorded as spans when profiletools is enabled.
+	"""
+	sol_f, sff_ = _sing(f, search, resultants)
+	return sol_f, sff_.as_SFF()
+
+def _sing(f, search, resultants):
+	""" sing() returning the splitting field itself """
+	if not search in ('gcd', 'pairs'):
+		raise ValueError("search must be 'gcd' or 'pairs', not %s" % search)
 	if not isinstance(f, Poly):
 		if isinstance(f, SFFPoly):
 			f = poly(f.rep, domain=f.as_sympy_FF())
@@ -24,55 +55,400 @@ def sing(f):
 			raise TypeError("argument must be a Poly or SFFPoly object, not %s" % f.__class__.__name__)
 	x, y = symbols('x y') # tuple
 	mod = f.get_modulus()
-	f_x = factor_list(resultant(f, diff(f, x), y), modulus=mod)[1]
-	f_y = factor_list(resultant(f, diff(f, y), x), modulus=mod)[1]
+	F = sffpoly(f, cached_sff(0, mod))
+	curve = sffbivariate(F, F.dom, x, y)
+	r_x, r_y = resultants if resultants is not None else (None, None)
+	with span('resultant'):
+		if r_x is None or not r_x.terms:
+			r_x = _eliminant(F, x, y)
+		if r_y is None or not r_y.terms:
+			r_y = _eliminant(F, y, x)
+	with span('factor_list'):
+		f_x = _factors(r_x)
+		f_y = _factors(r_y)
 
 	rel_list = []
-	count, a, p_x, sol_x = 0, [], [], []
+	count, a, p_x, sol_x, orb_x = 0, [], [], [], []
 	for f_x_ in f_x:
-		f_x_ = f_x_[0]
-		if not _has_roots(f_x_, x, mod):
+		with span('root_finding'):
+			_has = _has_roots(f_x_, x, mod)
+		if not _has:
 			a.append(symbols('a_' + str(count)))
 			f_x_a = f_x_.subs({x: a[count]})
 			rel_list.append(f_x_a)
-			p_x_ = sffpoly(f_x_, sff(f_x_a, mod))
+			with span('domain_construction'):
+				p_x_ = sffpoly(f_x_, cached_sff(f_x_a, mod))
+				_conj = p_x_.dom.conjugates(a[count])
 			p_x.append(p_x_)
-			sol_x.extend([{x: reduce(a[count] ** (mod ** d), p_x_.dom)} for d in range(p_x_.degree())])
+			orb_x.append((len(sol_x), p_x_.dom, a[count]))
+			sol_x.extend([{x: c} for c in _conj])
 			count += 1
 		else:
-			p_x_ = sffpoly(f_x_, sff(0, mod))
+			p_x_ = sffpoly(f_x_, cached_sff(0, mod))
 			p_x.append(p_x_)
-			sol_x.extend([{x: n} for n in range(mod) if p_x_.subs({x: n}) == 0])
+			with span('root_finding'):
+				_roots = p_x_.roots()
+			for r, m in _roots:
+				orb_x.append((len(sol_x), p_x_.dom, r.vec[0]))
+				sol_x.append({x: r.vec[0]})
 
-	count, b, p_y, sol_y = 0, [], [], []
+	count, b, p_y, sol_y, orb_y = 0, [], [], [], []
 	for f_y_ in f_y:
-		f_y_ = f_y_[0]
-		if not _has_roots(f_y_, y, mod):
+		with span('root_finding'):
+			_has = _has_roots(f_y_, y, mod)
+		if not _has:
 			b.append(symbols('b_' + str(count)))
 			f_y_b = f_y_.subs({y: b[count]})
 			rel_list.append(f_y_b)
-			p_y_ = sffpoly(f_y_, sff(f_y_b, mod))
+			with span('domain_construction'):
+				p_y_ = sffpoly(f_y_, cached_sff(f_y_b, mod))
+				_conj = p_y_.dom.conjugates(b[count])
 			p_y.append(p_y_)
-			sol_y.extend([{y: reduce(b[count] ** (mod ** d), p_y_.dom)} for d in range(p_y_.degree())])
+			orb_y.append((len(sol_y), f_y_, f_y_b, p_y_.dom.exdeg))
+			sol_y.extend([{y: c} for c in _conj])
 			count += 1
 		else:
-			p_y_ = sffpoly(f_y_, sff(0, mod))
+			p_y_ = sffpoly(f_y_, cached_sff(0, mod))
 			p_y.append(p_y_)
-			sol_y.extend([{y: n} for n in range(mod) if p_y_.subs({y: n}) == 0])
+			with span('root_finding'):
+				_roots = p_y_.roots()
+			for r, m in _roots:
+				orb_y.append((len(sol_y), y - r.vec[0], None, 1))
+				sol_y.append({y: r.vec[0]})
 
-	sff_ = sff(rel_list, mod)
-	f = sffpoly(f, sff_)
-	f_x = f.diff(x)
-	f_y = f.diff(y)
+	with span('domain_construction'):
+		sff_ = cached_sff(rel_list, mod)
 	sol_f = []
-	for point in product(sol_x, sol_y):
-		point_ = {x: point[0][x], y: point[1][y]}
-		if f_x.subs(point_) == 0 and f_y.subs(point_) == 0 and f.subs(point_) == 0:
-			sol_f.append(point_)
+	with span('candidate_check'):
+		if search == 'gcd':
+			for i, j in sorted(_singular_pairs(curve, y, orb_x, orb_y, sol_y)):
+				sol_f.append({x: sol_x[i][x], y: sol_y[j][y]})
+		else:
+			_eval = curve.set_domain(sff_).compile()
+			for point in product(sol_x, sol_y):
+				point_ = {x: point[0][x], y: point[1][y]}
+				if _eval.is_singular(point_):
+					sol_f.append(point_)
+	return sol_f, sff_
 
-	elapsed_time = time.time() - start
-	print("elapsed_time:{0}".format(elapsed_time) + "[sec]")
-	return sol_f, sff_.as_SFF()
+"""
+	Depth of the resolution tree at which resolve() gives up; the infinitely
+	near points of a reduced curve are smooth long before.
+"""
+RESOLVE_DEPTH = 64
+
+class ResolutionNode:
+	"""
+	a point of a plane curve or one of its infinitely near points in the tree
+	returned by resolve()
+
+	Examples
+	========
+
+	>>> x, y = symbols('x y')
+	>>> tree = resolve(poly(y ** 2 - x ** 3, x, y, modulus=7))
+	>>> [node.mult for node in tree.nodes()]
+	[2, 1]
+
+	"""
+
+	__slots__ = ('point', 'dom', 'chart', 'curve', 'mult', 'degree', 'children')
+
+	def __init__(self, point, dom, chart, curve, degree=1):
+		"""
+			Instance variables:
+			* point: (x, y) as SFFElements of dom in the coordinates of the chart,
+			         None for the root, which holds the whole curve
+			* dom: domain field of the point which is a SFF instance
+			* chart: 'x' for the chart x = x, y = x*y and 'y' for x = x*y, y = y
+			         of the blow-up of the parent point, None for points of the curve
+			* curve: SFFBivariatePoly of the strict transform moved to the point
+			* mult: multiplicity of the curve at the point
+			* degree: number of conjugate points over the parent domain it stands for
+			* children: points of the strict transform on the exceptional divisor
+		"""
+		self.point = point
+		self.dom = dom
+		self.chart = chart
+		self.curve = curve
+		self.mult = curve.order() if point is not None else None
+		self.degree = degree
+		self.children = []
+
+	def __repr__(self):
+		if self.point is None:
+			return "%s(%s, %s)" % (self.__class__.__name__, self.curve.rep, self.dom.as_SFF())
+		return "%s(%s, (%s, %s), mult=%s, %s)" % (self.__class__.__name__, self.chart,
+			self.point[0], self.point[1], self.mult, self.dom.as_SFF())
+
+	@property
+	def is_smooth(self):
+		return self.mult is not None and self.mult <= 1
+
+	def nodes(self):
+		""" the points below self in depth-first order """
+		for child in self.children:
+			yield child
+			yield from child.nodes()
+
+	def leaves(self):
+		return [node for node in self.nodes() if not node.children]
+
+class LocalExpansion:
+	"""
+	a plane curve moved to one of its points by a single Taylor shift,
+	made by local_expansion()
+
+	Examples
+	========
+
+	>>> x, y = symbols('x y')
+	>>> e = local_expansion(poly(y ** 2 - x ** 3 - x ** 2, x, y, modulus=7), {x: 0, y: 0})
+	>>> e.mult, e.tangent_cone, e.delta
+	(2, SFFBivariatePoly(-x**2 + y**2, FF(7)), 1)
+
+	"""
+
+	__slots__ = ('point', 'dom', 'curve', 'mult', '_tree')
+
+	def __init__(self, point, dom, curve):
+		"""
+			Instance variables:
+			* point: (x, y) as SFFElements of dom
+			* dom: domain field of the point which is a SFF instance
+			* curve: SFFBivariatePoly of the curve with the point moved to the origin
+			* mult: multiplicity of the curve at the point
+		"""
+		self.point = tuple(SFFElement.from_vec(c, dom) for c in point)
+		self.dom = dom
+		self.curve = curve
+		self.mult = curve.order()
+		self._tree = None
+
+	def __repr__(self):
+		return "%s((%s, %s), mult=%s, %s)" % (self.__class__.__name__,
+			self.point[0], self.point[1], self.mult, self.dom.as_SFF())
+
+	@property
+	def tangent_cone(self):
+		""" homogeneous part of the lowest degree of the shifted curve """
+		m = self.mult
+		return self.curve._new(dict((e, c) for e, c in self.curve.terms.items() if e[0] + e[1] == m))
+
+	def tangents(self):
+		"""
+		directions of the tangent lines as (t, number of conjugates, domain of t)
+		for the lines y = t*x, and (None, 1, dom) for x = 0
+		"""
+		if self.mult <= 0:
+			return []
+		_tangents = [(SFFElement.from_vec(t, dom), d, dom) for t, d, dom in _cone_roots(self.curve, self.mult, self.dom)]
+		if not (0, self.mult) in self.curve.terms:
+			_tangents.append((None, 1, self.dom))
+		return _tangents
+
+	def tree(self):
+		""" ResolutionNode of the point with the tree of its blow-ups, built once """
+		if self._tree is None:
+			self._tree = _resolve_at(self.curve, self.dom, [c.vec for c in self.point], None, 1, 0)
+		return self._tree
+
+	@property
+	def delta(self):
+		""" delta invariant sum m * (m - 1) / 2 over the infinitely near points """
+		return _delta(self.tree())
+
+@counted('resolve')
+def resolve(f, search='gcd'):
+	"""
+	resolution tree of the singularities of a plane curve f (Algorithm S-M*).
+	Every singular point of sing(f, search) is moved to the origin of the curve
+	over its domain by local_expansion() and blown up. Away from the exceptional divisor a blow-up
+	changes nothing, so the only candidates for singular points of the strict
+	transform are the roots of the tangent cone on the divisor: no resultants
+	are computed after sing(). Each point lives in the field generated by its
+	coordinates, a single field when they need several relations, and the
+	fields and the embeddings between them are built once and shared.
+	"""
+	if not isinstance(f, Poly):
+		if isinstance(f, SFFPoly):
+			f = poly(f.rep, domain=f.as_sympy_FF())
+		else:
+			raise TypeError("argument must be a Poly or SFFPoly object, not %s" % f.__class__.__name__)
+	x, y = symbols('x y') # tuple
+	with span('sing'):
+		sol_f, sff_ = _sing(f, search, None)
+	curve = sffbivariate(f, cached_sff(0, f.get_modulus()), x, y)
+	tree = ResolutionNode(None, curve.dom, None, curve)
+	for point in sol_f:
+		tree.children.append(local_expansion(curve, point, sff_).tree())
+	return tree
+
+def local_expansion(f, point, dom=None):
+	"""
+	LocalExpansion of a plane curve f at point = {x: a, y: b} with its
+	multiplicity, tangent cone and delta invariant.
+	f is a Poly or SFFPoly in x and y or a SFFBivariatePoly and the coordinates
+	are values of dom, which defaults to the domain of SFFElement coordinates
+	or else to the one of f; for the points of sing(f) it is their splitting field.
+	The Taylor shift is done once and kept for the blow-ups of resolve().
+	"""
+	x, y = symbols('x y') # tuple
+	if isinstance(f, SFFBivariatePoly):
+		curve = f
+		x, y = f.x, f.y
+	elif isinstance(f, SFFPoly):
+		curve = sffbivariate(f, f.dom, x, y)
+	elif isinstance(f, Poly):
+		curve = sffbivariate(f, cached_sff(0, f.get_modulus()), x, y)
+	else:
+		raise TypeError("argument must be a Poly, SFFPoly or SFFBivariatePoly object, not %s" % f.__class__.__name__)
+	coords = [point[x], point[y]]
+	if dom is None:
+		_elems = [c for c in coords if isinstance(c, SFFElement)]
+		dom = _elems[0].dom if _elems else curve.dom
+	if curve.dom.is_prime:
+		dom, coords = _point_domain(coords, dom)
+	else:
+		coords = [dom.convert(c) for c in coords]
+	return _local_expansion(_embed_curve(curve, dom), *coords)
+
+_expansions = LRUCache(DOMAIN_CACHE_SIZE)
+
+def _local_expansion(curve, a, b):
+	""" LocalExpansion of curve at (a, b), memoized in _expansions """
+	_key = (curve, a, b)
+	_expansion = _expansions.get(_key)
+	if _expansion is None:
+		with span('taylor_shift'):
+			_expansion = LocalExpansion((a, b), curve.dom, curve.translate(a, b))
+		_expansions.put(_key, _expansion)
+	return _expansion
+
+def _delta(node, n=1):
+	""" delta invariant below node, which stands for n conjugate points """
+	n *= node.degree
+	return n * node.mult * (node.mult - 1) // 2 + sum(_delta(child, n) for child in node.children)
+
+def _point_domain(coords, sff_):
+	"""
+	the field generated by the coordinates of a point of sff_ over the prime
+	field with the coordinates in it, a single field for several relations
+	"""
+	_symbols = set().union(*[sff_.to_sympy(sff_.convert(c)).free_symbols for c in coords])
+	dom = cached_sff([rel['rep'] for rel in sff_.rel_list if rel['var'] in _symbols], sff_.mod)
+	coords = [dom.convert(c) for c in coords]
+	if len(dom.degs) > 1:
+		_dom = _field(dom.mod, dom.exdeg)
+		basis = _embedding(dom, _dom)
+		dom, coords = _dom, [_embed(c, basis, _dom) for c in coords]
+	return dom, coords
+
+def _resolve_at(g, dom, point, chart, degree, depth):
+	""" node of the point moved to the origin of g with the tree of its blow-ups """
+	node = ResolutionNode(tuple(SFFElement.from_vec(c, dom) for c in point), dom, chart, g, degree)
+	m = node.mult
+	if m <= 1:
+		return node
+	if depth >= RESOLVE_DEPTH:
+		raise ValueError("no resolution after %s blow-ups, the curve may not be reduced" % depth)
+	with span('blowup'):
+		g_x = g.blowup_x()
+	for t, d, dom_t in _cone_roots(g, m, dom):
+		with span('blowup'):
+			_g = _embed_curve(g_x, dom_t).translate(dom_t.zero, t)
+		node.children.append(_resolve_at(_g, dom_t, (dom_t.zero, t), 'x', d, depth + 1))
+	if not (0, m) in g.terms:
+		with span('blowup'):
+			g_y = g.blowup_y()
+		node.children.append(_resolve_at(g_y, dom, (dom.zero, dom.zero), 'y', 1, depth + 1))
+	return node
+
+def _cone_roots(g, m, dom):
+	"""
+	points (0, t) of the exceptional divisor in the chart x = x, y = x*y,
+	the roots t of g_m(1, t) for the tangent cone g_m of g at the origin,
+	as (t, number of conjugates, domain of t) with one root per irreducible factor
+	over dom. The roots of a factor of degree d live in the single field of
+	degree exdeg * d, into which dom is embedded.
+	"""
+	_cone = dup_strip([g.terms.get((m - j, j), dom.zero) for j in range(m + 1)])
+	if len(_cone) < 2:
+		return []
+	_roots = []
+	with span('tangent_cone'):
+		_, _list = dup_factor_list(_cone, dom)
+		for q, k in _list:
+			d = len(q) - 1
+			if d == 1:
+				_roots.append((dom.neg(q[0]), 1, dom))
+				continue
+			dom_t = _field(dom.mod, dom.exdeg * d)
+			basis = _embedding(dom, dom_t)
+			q = [_embed(c, basis, dom_t) for c in q]
+			t = min((r for r, _ in dup_roots(q, dom_t)), key=dom_t._vec_to_index)
+			_roots.append((t, d, dom_t))
+	return _roots
+
+_fields = LRUCache(DOMAIN_CACHE_SIZE)
+_embeddings = LRUCache(DOMAIN_CACHE_SIZE)
+
+def _field(mod, n):
+	"""
+	FF(mod ** n) by the first monic irreducible polynomial of degree n
+	in the order of the coefficient indices
+	"""
+	dom = _fields.get((mod, n))
+	if dom is None:
+		_prime = cached_sff(0, mod)
+		if n == 1:
+			dom = _prime
+		else:
+			for i in range(mod, mod ** n):
+				_rel = [_prime.from_int(i // mod ** k) for k in range(n)] + [_prime.one]
+				_, _list = dup_factor_list(_rel, _prime)
+				if len(_list) == 1 and _list[0][1] == 1:
+					break
+			dom = cached_sff(SFFPoly.from_dense(_rel, symbols('c'), _prime).rep, mod)
+		_fields.put((mod, n), dom)
+	return dom
+
+def _embedding(dom, dom_):
+	"""
+	images in dom_ of the basis of dom, which sends every generator of dom
+	to the least root of its relation in dom_
+	"""
+	basis = _embeddings.get((dom, dom_))
+	if basis is None:
+		_gens = []
+		for rel in dom.rel_list:
+			_rel = sffpoly(rel['rep'], cached_sff(0, dom.mod)).to_dense()
+			_rel = [c + (0,) * (dom_.dim - 1) for c in _rel]
+			_gens.append(min((r for r, _ in dup_roots(_rel, dom_)), key=dom_._vec_to_index))
+		basis = []
+		for e in dom._exps:
+			_vec = dom_.one
+			for g, k in zip(_gens, e):
+				_vec = dom_.mul(_vec, dom_.pow(g, k))
+			basis.append(_vec)
+		_embeddings.put((dom, dom_), basis)
+	return basis
+
+def _embed(vec, basis, dom):
+	_vec = dom.zero
+	for c, b in zip(vec, basis):
+		if c:
+			_vec = dom.add(_vec, dom.mul_int(b, c))
+	return _vec
+
+def _embed_curve(g, dom):
+	""" g over dom, which extends the domain of g or has a single relation """
+	if dom == g.dom:
+		return g
+	if g.dom.is_prime:
+		return g.set_domain(dom)
+	basis = _embedding(g.dom, dom)
+	return SFFBivariatePoly(dict((e, _embed(c, basis, dom)) for e, c in g.terms.items()), dom, g.x, g.y)
 
 def sing_apart(f):
 	if not isinstance(f, Poly):
@@ -89,32 +465,160 @@ def sing_apart(f):
 	if not _has_roots(f_x, x, mod):
 		f_x_ = f_x.subs({x: a})
 		rel_list.append(f_x_)
-		f_x = sffpoly(f_x, sff(f_x_, mod))
-		sol_x = [{x: reduce(a ** (mod ** d), f_x.dom)} for d in range(f_x.degree())]
+		f_x = sffpoly(f_x, cached_sff(f_x_, mod))
+		sol_x = [{x: c} for c in f_x.dom.conjugates(a)]
 	else:
-		f_x = sffpoly(f_x, sff(0, mod))
-		sol_x = [{x: n} for n in range(f_x.dom.mod) if f_x.subs({x: n}) == 0]
+		f_x = sffpoly(f_x, cached_sff(0, mod))
+		sol_x = [{x: r.vec[0]} for r, m in f_x.roots()]
 
 	if not _has_roots(f_y, y, mod):
 		f_y_ = f_y.subs({y: b})
 		rel_list.append(f_y_)
-		f_y = sffpoly(f_y, sff(f_y_, mod))
-		sol_y = [{y: reduce(b ** (mod ** d), f_y.dom)} for d in range(f_y.degree())]
+		f_y = sffpoly(f_y, cached_sff(f_y_, mod))
+		sol_y = [{y: c} for c in f_y.dom.conjugates(b)]
 	else:
-		f_y = sffpoly(f_y, sff(0, mod))
-		sol_y = [{y: n} for n in range(f_y.dom.mod) if f_y.subs({y: n}) == 0]
+		f_y = sffpoly(f_y, cached_sff(0, mod))
+		sol_y = [{y: r.vec[0]} for r, m in f_y.roots()]
 
-	sff_f = sff(rel_list, mod)
-	f = sffpoly(f, sff_f)
+	sff_f = cached_sff(rel_list, mod)
+	_eval = sffbivariate(f, sff_f, x, y).compile()
 	sol_f = []
 	for point in product(sol_x, sol_y):
 		point_ = {x: point[0][x], y: point[1][y]}
-		if f_x.subs(point_) == 0 and f_y.subs(point_) == 0 and f.subs(point_) == 0:
+		if _eval.is_singular(point_):
 			sol_f.append(point_)
 	return sol_f, sff_f.as_SFF()
 
+def _eliminant(F, x, y):
+	"""
+	first nonzero res_y(F, F_x + c * F_y) in x for c = 0, ..., mod - 1, else
+	res_y(F, F_y); it vanishes at the x-coordinates of the singular points.
+	res_y(F, F_x) is zero when F and F_x have a common factor, e.g. F_x = 0
+	for y**2 - x**3 over FF(3). Raises a ValueError when every combination
+	is zero, as for curves with a multiple component.
+	"""
+	F_x, F_y = F.diff(x), F.diff(y)
+	for G in [F_x + F_y * c for c in range(F.dom.mod)] + [F_y]:
+		if G.terms:
+			r = sffresultant(F, G, y)
+			if r.terms:
+				return r
+	raise ValueError("every resultant of %s with its partial derivatives vanishes" % F.rep)
+
+def _singular_pairs(curve, y, orb_x, orb_y, sol_y):
+	"""
+	index pairs (i, j) of the x-roots and y-roots sol_y at singular points
+	of the sffbivariate curve over the prime field.
+	orb_x holds (index of the first conjugate, domain, root) of every Frobenius
+	orbit of x-roots and orb_y holds (index of the first conjugate, y-factor,
+	relation, number of conjugates) of every orbit of y-roots. The y-values over the first x-root
+	of an orbit are the common roots of h = gcd(f, f_x, f_y) at that root with
+	the y-factors, and applying the Frobenius map to both coordinates gives
+	the points over the other conjugates.
+	"""
+	_pairs = set()
+	_partials = (curve.diff_x(), curve.diff_y())
+	for i, dom, alpha in orb_x:
+		h = curve.set_domain(dom).subs_x(alpha)
+		for g in _partials:
+			h = sffgcd(h, g.set_domain(dom).subs_x(alpha))
+		if h.is_const and h.terms:
+			continue
+		for j, g, rel, e in orb_y:
+			k = sffgcd(h, sffpoly(g, dom))
+			if k.is_const:
+				continue
+			if rel is None:
+				_roots = [0]
+			else:
+				k = sffpoly(k.rep, dom.extend(rel))
+				_roots = [t for t in range(e) if k.subs({y: sol_y[j + t][y]}) == 0]
+			for t in _roots:
+				for s in range(dom.exdeg):
+					_pairs.add((i + s, j + (t + s) % e))
+	return _pairs
+
+def _factors(f):
+	""" monic irreducible factors of an univariate sffpoly as expressions """
+	if f.is_const:
+		return []
+	return [g.rep for g, m in sfffactor_list(f)[1]]
+
+def sing_many(polys, mod, workers=None):
+	"""
+	singular points of many curves in x and y over FF(mod) on the shared pool
+	with workers processes. Yields (index of the curve in polys, sing(f))
+	in order of completion. Every worker keeps the domains it builds
+	(see cached_sff), so extensions recurring among the curves are built once.
+	The pool settings before the call are restored when the iteration ends.
+	"""
+	polys = list(polys)
+	_tasks = ((i, f, mod) for i, f in enumerate(polys))
+	with pool_settings(workers):
+		yield from pool_stream(_sing_at, _tasks, len(polys) * SING_SIZE)
+
+def sing_sweep(f, N, workers=None, search='gcd'):
+	"""
+	singular points of an integral curve f in x and y modulo every prime p < N
+	as a table {p: sing(f mod p)}.
+	The resultants of f with its partial derivatives are computed once over
+	the integers and reduced modulo each prime whose reduction keeps their
+	degrees. A singular point modulo p is a common root of res_y(f, f_x) and
+	res_y(f, f_y) modulo p, so p divides D = res_x(res_y(f, f_x), res_y(f, f_y));
+	when D is nonzero the other primes are screened out with no singular
+	points. The remaining primes run on the shared pool with workers processes.
+	A prime modulo which f has a multiple component, so that sing() raises
+	a ValueError, is recorded as 'non-reduced'.
+	"""
+	if not search in ('gcd', 'pairs'):
+		raise ValueError("search must be 'gcd' or 'pairs', not %s" % search)
+	x, y = symbols('x y')
+	f = f.as_expr()
+	f_yx, f_xy = Poly(f, y, x, domain='ZZ'), Poly(f, x, y, domain='ZZ')
+	r_x = resultant(f_yx, f_yx.diff(x))
+	r_y = resultant(f_xy, f_xy.diff(y))
+	D = resultant(r_x, resultant(f_yx, f_yx.diff(y))) if not r_x.is_zero else 0
+	_exact = [_lc_content(f_yx), _lc_content(f_yx.diff(x)), _lc_content(f_xy), _lc_content(f_xy.diff(y))]
+	_table = {}
+	_tasks = []
+	for p in primerange(2, N):
+		if D and D % p:
+			_table[p] = ([], cached_sff(0, p).as_SFF())
+		elif any(c % p == 0 for c in _exact):
+			_tasks.append((p, f, None, None, search))
+		else:
+			_tasks.append((p, f, _reduce_int_poly(r_x, x, p), _reduce_int_poly(r_y, y, p), search))
+	with pool_settings(workers):
+		for p, _sing in pool_stream(_sweep_at, _tasks, len(_tasks) * SING_SIZE):
+			_table[p] = _sing
+	return dict(sorted(_table.items()))
+
+def _sweep_at(p, f, r_x, r_y, search):
+	x, y = symbols('x y')
+	try:
+		return p, sing(poly(f, x, y, modulus=p), search, (r_x, r_y))
+	except ValueError:
+		return p, 'non-reduced'
+
+def _lc_content(f):
+	""" content of the leading coefficient of f in its first generator """
+	d = f.degree()
+	return reduce(gcd, [int(c) for m, c in f.terms() if m[0] == d], 0) if not f.is_zero else 0
+
+def _reduce_int_poly(f, var, p):
+	""" univariate integral Poly as a sffpoly over FF(p) """
+	dom = cached_sff(0, p)
+	return SFFPoly.from_dense([(int(c) % p,) for c in reversed(f.all_coeffs())], var, dom)
+
+def _sing_at(i, f, mod):
+	x, y = symbols('x y')
+	return i, sing(poly(f.as_expr(), x, y, modulus=mod))
+
+_roots_cache = LRUCache(DOMAIN_CACHE_SIZE)
+
 def _has_roots(f, var, mod):
-	for i in range(mod):
-		if f.subs({var: i}) % mod == 0:
-			return True
-	return False
\ No newline at end of file
+	_has = _roots_cache.get((f, mod))
+	if _has is None:
+		_has = sffpoly(f, cached_sff(0, mod)).has_roots()
+		_roots_cache.put((f, mod), _has)
+	return _has
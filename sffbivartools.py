@@ -0,0 +1,297 @@
+"""
+    Sparse bivariate polynomials over a SFF for plane curves.
+
+    A polynomial in x and y is a dict {(i, j): element vector} of its nonzero
+    terms c * x**i * y**j (see SFF._init_native). Partial derivatives,
+    substitution of one variable and the monomial coordinate changes of the
+    blow-up charts work on the terms directly, in time linear in their number.
+"""
+from sympy.core.numbers import Integer
+from sympy.core.symbol import symbols
+from sympy.polys.polytools import Poly
+
+from sffelements import SFFElement
+from sffpolytools import SFFPoly, _lift_terms, _mul_terms
+from sffevaltools import SFFEvaluator
+from sffdensetools import dup_eval, dup_shift
+
+class SFFBivariatePoly:
+    """
+    represents a polynomial in two variables x, y over a SFF
+
+    Examples
+    ========
+
+    >>> x, y = symbols('x y')
+    >>> f = sffbivariate(y ** 2 - x ** 3, sff(0, 7))
+    >>> f.blowup_x()
+    SFFBivariatePoly(-x + y**2, FF(7))
+
+    """
+
+    __slots__ = ('terms', 'dom', 'x', 'y', '_rep')
+
+    def __init__(self, terms, dom, x, y):
+        """
+            Instance variables:
+            * terms: dict {(i, j): element vector of dom}
+                     which holds nonzero coefficients only
+            * dom: domain field which is a SFF instance
+            * x, y: the two variables
+
+            The sympy expression 'rep' is built from terms only when it is asked.
+        """
+        self.terms = dict((e, c) for e, c in terms.items() if any(c))
+        self.dom = dom
+        self.x = x
+        self.y = y
+        self._rep = None
+
+    def _new(f, terms):
+        """ polynomial over f.dom in the variables of f built from nonzero terms """
+        obj = SFFBivariatePoly.__new__(SFFBivariatePoly)
+        obj.terms = terms
+        obj.dom = f.dom
+        obj.x = f.x
+        obj.y = f.y
+        obj._rep = None
+        return obj
+
+    @property
+    def rep(self):
+        if self._rep is None:
+            _rep = Integer(0)
+            for (i, j), c in self.terms.items():
+                _rep += self.dom.to_sympy(c) * self.x ** i * self.y ** j
+            self._rep = _rep
+        return self._rep
+
+    def __getstate__(self):
+        return {'terms': self.terms, 'dom': self.dom, 'x': self.x, 'y': self.y}
+
+    def __setstate__(self, state):
+        self.terms = state['terms']
+        self.dom = state['dom']
+        self.x = state['x']
+        self.y = state['y']
+        self._rep = None
+
+    def __repr__(self):
+        return "%s(%s, %s)" % (self.__class__.__name__, self.rep, self.dom.as_SFF())
+
+    def as_expr(self):
+        return self.rep
+
+    def as_sffpoly(self):
+        """ the same polynomial as a SFFPoly over its variables """
+        return _sffpoly([self.x, self.y], self.terms, self.dom)
+
+    def _coerce(f, g):
+        if isinstance(g, SFFBivariatePoly):
+            if not f.dom == g.dom:
+                raise ValueError("argument polynomials have different domains")
+            if not (f.x, f.y) == (g.x, g.y):
+                raise ValueError("argument polynomials have different variables")
+            return g.terms
+        if isinstance(g, int) or isinstance(g, Integer) or isinstance(g, SFFElement):
+            return {(0, 0): f.dom.convert(g)}
+        return None
+
+    def __add__(f, g):
+        g = f._coerce(g)
+        if g is None:
+            return NotImplemented
+        dom = f.dom
+        _add = dict(f.terms)
+        for e, c in g.items():
+            _add[e] = dom.add(_add[e], c) if e in _add else c
+        return f._new(dict((e, c) for e, c in _add.items() if any(c)))
+
+    __radd__ = __add__
+
+    def __neg__(f):
+        return f._new(dict((e, f.dom.neg(c)) for e, c in f.terms.items()))
+
+    def __sub__(f, g):
+        g = f._coerce(g)
+        if g is None:
+            return NotImplemented
+        return f + f._new(g).__neg__()
+
+    def __rsub__(f, g):
+        return (-f).__add__(g)
+
+    def __mul__(f, g):
+        g = f._coerce(g)
+        if g is None:
+            return NotImplemented
+        _mul = _mul_terms(f.terms, g, f.dom)
+        return f._new(dict((e, c) for e, c in _mul.items() if any(c)))
+
+    __rmul__ = __mul__
+
+    def __eq__(f, g):
+        if isinstance(g, SFFBivariatePoly):
+            return f.dom == g.dom and (f.x, f.y) == (g.x, g.y) and f.terms == g.terms
+        g = f._coerce(g)
+        return g is not None and f.terms == dict((e, c) for e, c in g.items() if any(c))
+
+    def __hash__(self):
+        return hash((frozenset(self.terms.items()), self.x, self.y))
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def is_zero(self):
+        return not self.terms
+
+    def degree(self, *gens):
+        """ total degree, or the degree in gens[0]; -1 for the zero polynomial """
+        if not self.terms:
+            return -1
+        if len(gens) == 0:
+            return max(i + j for i, j in self.terms)
+        if gens[0] == self.x:
+            return max(i for i, j in self.terms)
+        if gens[0] == self.y:
+            return max(j for i, j in self.terms)
+        return 0
+
+    def order(self):
+        """ lowest total degree of the terms, the multiplicity at the origin """
+        if not self.terms:
+            return -1
+        return min(i + j for i, j in self.terms)
+
+    def coeff(self, i, j):
+        return SFFElement.from_vec(self.terms.get((i, j), self.dom.zero), self.dom)
+
+    def set_domain(self, dom):
+        """ the same polynomial over an extension dom of its domain """
+        if dom == self.dom:
+            return self
+        if dom.mod != self.dom.mod:
+            raise ValueError("cannot convert between different characteristics")
+        if self.dom.dim == 1:
+            _pad = (0,) * (dom.dim - 1)
+            _terms = dict((e, c + _pad) for e, c in self.terms.items())
+        else:
+            _terms = dict((e, dom.from_sympy(self.dom.to_sympy(c))) for e, c in self.terms.items())
+        return SFFBivariatePoly(_terms, dom, self.x, self.y)
+
+    def diff(self, *gens):
+        """ partial derivative by gens[0], which defaults to x """
+        k = 1 if len(gens) and gens[0] == self.y else 0
+        if len(gens) and not gens[0] in (self.x, self.y):
+            return self._new({})
+        p = self.dom.mod
+        _diff = {}
+        for e, c in self.terms.items():
+            if e[k] % p:
+                e_ = (e[0] - 1, e[1]) if k == 0 else (e[0], e[1] - 1)
+                _diff[e_] = self.dom.mul_int(c, e[k])
+        return self._new(_diff)
+
+    def diff_x(self):
+        return self.diff(self.x)
+
+    def diff_y(self):
+        return self.diff(self.y)
+
+    def subs_x(self, a):
+        """ f(a, y) as a univariate SFFPoly in y """
+        return self._subs(a, 0)
+
+    def subs_y(self, b):
+        """ f(x, b) as a univariate SFFPoly in x """
+        return self._subs(b, 1)
+
+    def _subs(self, a, k):
+        dom = self.dom
+        a = dom.convert(a)
+        _pow = [dom.one]
+        _subs = {}
+        for e, c in self.terms.items():
+            while len(_pow) <= e[k]:
+                _pow.append(dom.mul(_pow[-1], a))
+            c = dom.mul(c, _pow[e[k]])
+            e_ = (e[1 - k],)
+            _subs[e_] = dom.add(_subs[e_], c) if e_ in _subs else c
+        return _sffpoly([self.y if k == 0 else self.x], _subs, dom)
+
+    def __call__(self, a, b):
+        """ value at (a, b) as a SFFElement """
+        _val = dup_eval(self.subs_x(a).to_dense(), self.dom.convert(b), self.dom)
+        return SFFElement.from_vec(_val, self.dom)
+
+    def compile(self):
+        """ SFFEvaluator of self and its partial derivatives at points (x, y) """
+        return SFFEvaluator([self.x, self.y], self.terms, self.dom)
+
+    def swap(self):
+        """ f(y, x) """
+        return self._new(dict(((j, i), c) for (i, j), c in self.terms.items()))
+
+    def blowup_x(self, strict=True):
+        """
+        f(x, x*y) in the chart x = x, y = x*y of the blow-up at the origin,
+        divided by the power x**m of the exceptional divisor when strict
+        """
+        m = self.order() if strict and self.terms else 0
+        return self._new(dict(((i + j - m, j), c) for (i, j), c in self.terms.items()))
+
+    def blowup_y(self, strict=True):
+        """
+        f(x*y, y) in the chart x = x*y, y = y of the blow-up at the origin,
+        divided by the power y**m of the exceptional divisor when strict
+        """
+        m = self.order() if strict and self.terms else 0
+        return self._new(dict(((i, i + j - m), c) for (i, j), c in self.terms.items()))
+
+    def translate(self, a, b):
+        """ f(x + a, y + b) by Taylor shifts of the columns in x and the rows in y """
+        dom = self.dom
+        a, b = dom.convert(a), dom.convert(b)
+        _terms = self.terms
+        if any(a):
+            _terms = _shift_terms(_terms, a, 0, dom)
+        if any(b):
+            _terms = _shift_terms(_terms, b, 1, dom)
+        return self._new(_terms)
+
+def _sffpoly(var, terms, dom):
+    obj = SFFPoly.__new__(SFFPoly)
+    obj._set_terms(var, terms, dom)
+    return obj
+
+def _shift_terms(terms, a, k, dom):
+    """ terms with the variable k replaced by itself plus a """
+    _lines = {}
+    for e, c in terms.items():
+        _lines.setdefault(e[1 - k], {})[e[k]] = c
+    _shift = {}
+    for l, line in _lines.items():
+        _dense = [line.get(d, dom.zero) for d in range(max(line) + 1)]
+        for d, c in enumerate(dup_shift(_dense, a, dom)):
+            if any(c):
+                _shift[(d, l) if k == 0 else (l, d)] = c
+    return _shift
+
+def sffbivariate(rep, dom, x=None, y=None):
+    """
+    Constructor method for SFFBivariatePoly from an expression, Poly or
+    SFFPoly in x and y, which default to the symbols x and y
+    """
+    if x is None or y is None:
+        x, y = symbols('x y')
+    if isinstance(rep, SFFPoly):
+        if any(not v in (x, y) for v in rep.var):
+            raise ValueError("need a polynomial in %s and %s, not in %s" % (x, y, rep.var))
+        _terms = _lift_terms(rep.terms, rep.var, [x, y])
+        return SFFBivariatePoly(_terms, rep.dom, x, y).set_domain(dom)
+    if isinstance(rep, int) or isinstance(rep, Integer) or isinstance(rep, SFFElement):
+        return SFFBivariatePoly({(0, 0): dom.convert(rep)}, dom, x, y)
+    _terms = {}
+    for monom, coeff in Poly(rep.as_expr(), x, y).terms():
+        _terms[monom] = dom.from_sympy(coeff)
+    return SFFBivariatePoly(_terms, dom, x, y)
@@ -0,0 +1,465 @@
+"""
+    Dense univariate polynomials over a SFF.
+
+    A dense polynomial is a list of element vectors (see SFF._init_native)
+    from degree 0 upwards, without trailing zeros. The zero polynomial is [].
+"""
+
+import random
+
+def dup_strip(f):
+    n = len(f)
+    while n and not any(f[n - 1]):
+        n -= 1
+    return f[:n] if n < len(f) else f
+
+def dup_degree(f):
+    """ degree of f, -1 for the zero polynomial """
+    return len(f) - 1
+
+def dup_is_one(f, dom):
+    return len(f) == 1 and f[0] == dom.one
+
+def dup_add(f, g, dom):
+    if len(f) < len(g):
+        f, g = g, f
+    _add = list(f)
+    for i, c in enumerate(g):
+        _add[i] = dom.add(_add[i], c)
+    return dup_strip(_add)
+
+def dup_sub(f, g, dom):
+    _sub = list(f) + [dom.zero] * (len(g) - len(f))
+    for i, c in enumerate(g):
+        _sub[i] = dom.sub(_sub[i], c)
+    return dup_strip(_sub)
+
+def dup_mul_ground(f, c, dom):
+    if not any(c):
+        return []
+    return [dom.mul(a, c) for a in f]
+
+"""
+    Multiplication kernels. dup_mul chooses by the length of the shorter factor:
+    Kronecker substitution, one product of big integers, from KRONECKER_THRESHOLD
+    over prime fields and domains of one relation; Karatsuba from
+    KARATSUBA_THRESHOLD over domains of several relations; the classical
+    product below. bench_dup_mul.py measures them: Kronecker substitution
+    wins from length 4 at the latest, Karatsuba with classical products
+    below 64 is 10-20% faster at length 64 and about twice as fast at 256
+    over FF(2**6), FF(5**6) and FF(7**6), while shorter splits do not pay.
+"""
+KRONECKER_THRESHOLD = 4
+KARATSUBA_THRESHOLD = 64
+
+def dup_mul(f, g, dom):
+    if not f or not g:
+        return []
+    n = min(len(f), len(g))
+    if n >= KRONECKER_THRESHOLD and len(dom.degs) <= 1:
+        return dup_mul_kronecker(f, g, dom)
+    if n >= KARATSUBA_THRESHOLD:
+        return dup_mul_karatsuba(f, g, dom)
+    return dup_mul_classical(f, g, dom)
+
+def dup_mul_classical(f, g, dom):
+    if not f or not g:
+        return []
+    _mul = [dom.zero] * (len(f) + len(g) - 1)
+    for i, a in enumerate(f):
+        if any(a):
+            for j, b in enumerate(g):
+                if any(b):
+                    _mul[i + j] = dom.add(_mul[i + j], dom.mul(a, b))
+    return dup_strip(_mul)
+
+def dup_mul_karatsuba(f, g, dom):
+    if len(f) < len(g):
+        f, g = g, f
+    if len(g) < KARATSUBA_THRESHOLD:
+        return dup_mul_classical(f, g, dom)
+    k = len(f) // 2
+    _mul = [dom.zero] * (len(f) + len(g) - 1)
+    f0, f1 = dup_strip(f[:k]), f[k:]
+    if len(g) <= k:
+        _parts = ((0, dup_mul_karatsuba(f0, g, dom)), (k, dup_mul_karatsuba(f1, g, dom)))
+    else:
+        g0, g1 = dup_strip(g[:k]), g[k:]
+        z0 = dup_mul_karatsuba(f0, g0, dom)
+        z2 = dup_mul_karatsuba(f1, g1, dom)
+        z1 = dup_mul_karatsuba(dup_add(f0, f1, dom), dup_add(g0, g1, dom), dom)
+        _parts = ((0, z0), (k, dup_sub(dup_sub(z1, z0, dom), z2, dom)), (2 * k, z2))
+    for s, z in _parts:
+        for i, c in enumerate(z):
+            _mul[s + i] = dom.add(_mul[s + i], c)
+    return dup_strip(_mul)
+
+def dup_mul_kronecker(f, g, dom):
+    """
+    f * g over a prime field or a domain of one relation by Kronecker substitution.
+    The coefficients of every element vector are packed into slots of one big
+    integer per polynomial, w = 2 * dim - 1 slots per degree so that products
+    of element vectors do not overlap, and each slot is wide enough for the
+    largest coefficient of the product. The slots of the integer product are
+    reduced by the relation afterwards.
+    """
+    if not f or not g:
+        return []
+    p, d = dom.mod, dom.dim
+    w = 2 * d - 1
+    B = (min(len(f), len(g)) * d * (p - 1) ** 2).bit_length() // 8 + 1
+    n = len(f) + len(g) - 1
+    _bytes = (_kronecker_pack(f, w, B) * _kronecker_pack(g, w, B)).to_bytes(n * w * B, 'little')
+    _slots = [int.from_bytes(_bytes[k:k + B], 'little') for k in range(0, n * w * B, B)]
+    if d == 1:
+        return dup_strip([(c % p,) for c in _slots])
+    return dup_strip([dom._reduce_prod(_slots[i:i + w]) for i in range(0, n * w, w)])
+
+def _kronecker_pack(f, w, B):
+    _pad = bytes(B * (w - len(f[0])))
+    return int.from_bytes(b''.join(b''.join(c.to_bytes(B, 'little') for c in u) + _pad for u in f), 'little')
+
+def dup_monic(f, dom):
+    """ returns (lc, f / lc) """
+    if not f:
+        return dom.zero, []
+    _lc = f[-1]
+    if _lc == dom.one:
+        return _lc, f
+    return _lc, dup_mul_ground(f, dom.inv(_lc), dom)
+
+def dup_divmod(f, g, dom):
+    """ division with remainder, g needs to be nonzero """
+    f = dup_strip(f)
+    dg = len(g) - 1
+    if dg < 0:
+        raise ZeroDivisionError("polynomial division by zero")
+    if len(f) <= dg:
+        return [], list(f)
+    _inv = dom.inv(g[-1])
+    _rem = list(f)
+    _div = [dom.zero] * (len(f) - dg)
+    for k in range(len(f) - 1, dg - 1, -1):
+        c = _rem[k]
+        if not any(c):
+            continue
+        c = dom.mul(c, _inv)
+        _div[k - dg] = c
+        for j in range(dg + 1):
+            if any(g[j]):
+                _rem[k - dg + j] = dom.sub(_rem[k - dg + j], dom.mul(c, g[j]))
+    return dup_strip(_div), dup_strip(_rem[:dg])
+
+def dup_rem(f, g, dom):
+    return dup_divmod(f, g, dom)[1]
+
+def dup_quo(f, g, dom):
+    return dup_divmod(f, g, dom)[0]
+
+def dup_diff(f, dom):
+    return dup_strip([dom.mul_int(c, i) for i, c in enumerate(f)][1:])
+
+def dup_eval(f, a, dom):
+    """ value of f at a by Horner's scheme """
+    _val = dom.zero
+    for c in reversed(f):
+        _val = dom.add(dom.mul(_val, a), c)
+    return _val
+
+def dup_shift(f, a, dom):
+    """ f(x + a) by repeated Horner steps on the coefficients (Taylor shift) """
+    _shift = list(f)
+    for i in range(len(f) - 1):
+        for k in range(len(f) - 2, i - 1, -1):
+            _shift[k] = dom.add(_shift[k], dom.mul(a, _shift[k + 1]))
+    return _shift
+
+"""
+    Degree from which gcds use the half-gcd recursion instead of Euclid's algorithm.
+"""
+HGCD_THRESHOLD = 256
+
+def dup_gcd(f, g, dom):
+    """ monic greatest common divisor """
+    f, g = dup_strip(f), dup_strip(g)
+    if len(f) < len(g):
+        f, g = g, f
+    while g:
+        if len(g) > HGCD_THRESHOLD:
+            M = _dup_hgcd(f, g, dom)
+            f, g = _dup_apply(M, f, g, dom)
+            if not g:
+                break
+        f, g = g, dup_rem(f, g, dom)
+    return dup_monic(f, dom)[1]
+
+def dup_gcdex(f, g, dom):
+    """ returns (s, t, h) with s * f + t * g == h == gcd(f, g) monic """
+    f, g = dup_strip(f), dup_strip(g)
+    if len(f) < len(g):
+        t, s, h = dup_gcdex(g, f, dom)
+        return s, t, h
+    if not f:
+        return [], [], []
+    T = (([dom.one], []), ([], [dom.one]))
+    while g:
+        if len(g) > HGCD_THRESHOLD:
+            M = _dup_hgcd(f, g, dom)
+            f, g = _dup_apply(M, f, g, dom)
+            T = _dup_matmul(M, T, dom)
+            if not g:
+                break
+        q, r = dup_divmod(f, g, dom)
+        f, g = g, r
+        T = (T[1], (dup_sub(T[0][0], dup_mul(q, T[1][0], dom), dom), dup_sub(T[0][1], dup_mul(q, T[1][1], dom), dom)))
+    _lc, h = dup_monic(f, dom)
+    _inv = dom.inv(_lc)
+    return dup_mul_ground(T[0][0], _inv, dom), dup_mul_ground(T[0][1], _inv, dom), h
+
+def dup_invert(f, g, dom):
+    """ inverse of f modulo g """
+    s, _, h = dup_gcdex(dup_rem(f, g, dom), g, dom)
+    if not dup_is_one(h, dom):
+        raise ValueError("polynomial is not invertible modulo the modulus")
+    return dup_rem(s, g, dom)
+
+def dup_resultant(f, g, dom):
+    """
+    resultant of f and g by Euclid's algorithm, using
+    res(f, g) = (-1) ** (deg f * deg g) * lc(g) ** (deg f - deg r) * res(g, r) for r = f mod g
+    """
+    f, g = dup_strip(f), dup_strip(g)
+    if not f or not g:
+        return dom.zero
+    _res = dom.one
+    while len(g) > 1:
+        r = dup_rem(f, g, dom)
+        if not r:
+            return dom.zero
+        if (len(f) - 1) * (len(g) - 1) % 2:
+            _res = dom.neg(_res)
+        _res = dom.mul(_res, dom.pow(g[-1], len(f) - len(r)))
+        f, g = g, r
+    return dom.mul(_res, dom.pow(g[0], len(f) - 1))
+
+def dup_interpolate(xs, ys, dom):
+    """ polynomial of degree less than len(xs) taking the values ys at the distinct points xs """
+    n = len(xs)
+    _diff = list(ys)
+    for k in range(1, n):
+        _inv = dom.batch_inv([dom.sub(xs[i], xs[i - k]) for i in range(k, n)])
+        for i in range(n - 1, k - 1, -1):
+            _diff[i] = dom.mul(dom.sub(_diff[i], _diff[i - 1]), _inv[i - k])
+    _interp = []
+    for i in range(n - 1, -1, -1):
+        _interp = dup_add(dup_mul(_interp, [dom.neg(xs[i]), dom.one], dom), [_diff[i]], dom)
+    return _interp
+
+"""
+    Half-gcd.
+    A 2x2 matrix M = ((m00, m01), (m10, m11)) of dense polynomials
+    maps (a, b) to (m00 * a + m01 * b, m10 * a + m11 * b).
+    Every matrix is a product of quotient steps, so the gcd is kept
+    even when a truncated recursion stops early.
+"""
+
+def _dup_apply(M, a, b, dom):
+    return (dup_add(dup_mul(M[0][0], a, dom), dup_mul(M[0][1], b, dom), dom),
+            dup_add(dup_mul(M[1][0], a, dom), dup_mul(M[1][1], b, dom), dom))
+
+def _dup_matmul(M, N, dom):
+    return tuple(tuple(dup_add(dup_mul(M[i][0], N[0][j], dom), dup_mul(M[i][1], N[1][j], dom), dom)
+                       for j in range(2)) for i in range(2))
+
+def _dup_hgcd(a, b, dom):
+    """
+    M with (a', b') = M (a, b) and deg b' < ceil(deg a / 2) <= deg a'
+    for deg a > deg b
+    """
+    _one = [dom.one]
+    m = len(a) // 2
+    if len(b) - 1 < m:
+        return ((_one, []), ([], _one))
+    R = _dup_hgcd(a[m:], b[m:], dom)
+    a, b = _dup_apply(R, a, b, dom)
+    if len(b) - 1 < m:
+        return R
+    q, r = dup_divmod(a, b, dom)
+    R = (R[1], (dup_sub(R[0][0], dup_mul(q, R[1][0], dom), dom), dup_sub(R[0][1], dup_mul(q, R[1][1], dom), dom)))
+    a, b = b, r
+    if len(b) - 1 < m:
+        return R
+    k = max(2 * m - (len(a) - 1), 0)
+    S = _dup_hgcd(a[k:], b[k:], dom)
+    return _dup_matmul(S, R, dom)
+
+"""
+    Barrett reduction.
+    For g of degree d the reciprocal h = 1 / rev(g) modulo x ** (d - 1),
+    rev(g) = x ** d * g(1 / x), is found once by Newton iteration. The quotient
+    of f by g for deg f <= 2 * d - 2 is then rev(rev(f) * h) truncated, so
+    reducing a product costs two multiplications.
+"""
+
+def dup_mullow(f, g, n, dom):
+    """ f * g modulo x ** n """
+    _mul = [dom.zero] * min(n, max(len(f) + len(g) - 1, 0))
+    for i, a in enumerate(f[:n]):
+        if any(a):
+            for j, b in enumerate(g[:n - i]):
+                if any(b):
+                    _mul[i + j] = dom.add(_mul[i + j], dom.mul(a, b))
+    return dup_strip(_mul)
+
+def dup_rev_inverse(g, n, dom):
+    """ 1 / rev(g) modulo x ** n by Newton iteration """
+    _rev = g[::-1]
+    _inv = [dom.inv(_rev[0])]
+    k = 1
+    while k < n:
+        k = min(2 * k, n)
+        _err = dup_sub([dom.from_int(2)], dup_mullow(_rev, _inv, k, dom), dom)
+        _inv = dup_mullow(_inv, _err, k, dom)
+    return _inv[:n]
+
+def dup_barrett(g, dom):
+    """ reciprocal of g for dup_rem_barrett """
+    return dup_rev_inverse(g, len(g) - 2, dom) if len(g) > 2 else []
+
+def dup_rem_barrett(f, g, h, dom):
+    """ f modulo g with the reciprocal h = dup_barrett(g, dom) """
+    f = dup_strip(f)
+    d = len(g) - 1
+    m = len(f) - 1 - d
+    if m < 0:
+        return f
+    if m > d - 2:
+        return dup_rem(f, g, dom)
+    _quo = dup_mullow(f[d:][::-1], h, m + 1, dom)
+    _quo = (_quo + [dom.zero] * (m + 1 - len(_quo)))[::-1]
+    return dup_sub(f[:d], dup_mullow(_quo, g, d, dom), dom)
+
+def dup_powmod(f, e, g, dom):
+    """ f ** e modulo g by repeated squaring with Barrett reduction """
+    h = dup_barrett(g, dom)
+    _pow = [dom.one]
+    f = dup_rem(f, g, dom)
+    while e:
+        if e & 1:
+            _pow = dup_rem_barrett(dup_mul(_pow, f, dom), g, h, dom)
+        e >>= 1
+        if e:
+            f = dup_rem_barrett(dup_mul(f, f, dom), g, h, dom)
+    return dup_rem(_pow, g, dom)
+
+def dup_pth_root(f, dom):
+    """ h with h ** mod == f, for f whose exponents are all divisible by mod """
+    p = dom.mod
+    return [dom.frobenius(c, dom.exdeg - 1) for c in f[::p]]
+
+def dup_random(n, dom):
+    """ random polynomial of degree less than n """
+    return dup_strip([dom._index_to_vec(random.randrange(dom.num)) for _ in range(n)])
+
+def dup_sqf_list(f, dom):
+    """ square-free decomposition [(g, m)] of a monic f """
+    _list = []
+    if len(f) <= 1:
+        return _list
+    fp = dup_diff(f, dom)
+    if fp:
+        c = dup_gcd(f, fp, dom)
+        w = dup_quo(f, c, dom)
+        i = 1
+        while not dup_is_one(w, dom):
+            y = dup_gcd(w, c, dom)
+            z = dup_quo(w, y, dom)
+            if len(z) > 1:
+                _list.append((z, i))
+            i += 1
+            w = y
+            c = dup_quo(c, y, dom)
+    else:
+        c = f
+    if len(c) > 1:
+        for g, m in dup_sqf_list(dup_pth_root(c, dom), dom):
+            _list.append((g, m * dom.mod))
+    return _list
+
+def dup_ddf(f, dom):
+    """ distinct-degree factorization [(g, d)] of a monic square-free f """
+    _list = []
+    x = [dom.zero, dom.one]
+    h = x
+    i = 1
+    while len(f) - 1 >= 2 * i:
+        h = dup_powmod(h, dom.num, f, dom)
+        g = dup_gcd(f, dup_sub(h, x, dom), dom)
+        if len(g) > 1:
+            _list.append((g, i))
+            f = dup_quo(f, g, dom)
+            h = dup_rem(h, f, dom)
+        i += 1
+    if len(f) > 1:
+        _list.append((f, len(f) - 1))
+    return _list
+
+def dup_edf(f, d, dom):
+    """ Cantor-Zassenhaus splitting of a monic square-free f whose factors have degree d """
+    n = len(f) - 1
+    if n <= d:
+        return [f]
+    while True:
+        h = dup_random(n, dom)
+        if len(h) < 2:
+            continue
+        if dom.mod == 2:
+            _split = _dup_trace(h, dom.exdeg * d, f, dom)
+        else:
+            _split = dup_sub(dup_powmod(h, (dom.num ** d - 1) // 2, f, dom), [dom.one], dom)
+        g = dup_gcd(f, _split, dom)
+        if 0 < len(g) - 1 < n:
+            return dup_edf(g, d, dom) + dup_edf(dup_quo(f, g, dom), d, dom)
+
+def _dup_trace(h, k, f, dom):
+    """ h + h ** 2 + ... + h ** (2 ** (k - 1)) modulo f """
+    _trace = h = dup_rem(h, f, dom)
+    for _ in range(k - 1):
+        h = dup_rem(dup_mul(h, h, dom), f, dom)
+        _trace = dup_add(_trace, h, dom)
+    return _trace
+
+def dup_factor_list(f, dom):
+    """ returns (lc, [(g, m)]) with monic irreducible g """
+    _lc, f = dup_monic(dup_strip(f), dom)
+    _list = []
+    for g, m in dup_sqf_list(f, dom):
+        for h, d in dup_ddf(g, dom):
+            for k in dup_edf(h, d, dom):
+                _list.append((k, m))
+    _list.sort(key=lambda item: (len(item[0]), item[1], [dom._vec_to_index(c) for c in item[0]]))
+    return _lc, _list
+
+def _dup_linear_part(f, dom):
+    """ gcd(f, x ** q - x), the product of the distinct linear factors of f """
+    x = [dom.zero, dom.one]
+    return dup_gcd(f, dup_sub(dup_powmod(x, dom.num, f, dom), x, dom), dom)
+
+def dup_has_roots(f, dom):
+    _, f = dup_monic(dup_strip(f), dom)
+    if len(f) <= 1:
+        return False
+    return len(_dup_linear_part(f, dom)) > 1
+
+def dup_roots(f, dom):
+    """ roots [(vec, m)] of f in dom with multiplicities, sorted by index """
+    _, f = dup_monic(dup_strip(f), dom)
+    if not f:
+        raise ValueError("zero polynomial has every element as root")
+    _roots = []
+    for g, m in dup_sqf_list(f, dom):
+        for k in dup_edf(_dup_linear_part(g, dom), 1, dom):
+            if len(k) == 2:
+                _roots.append((dom.neg(k[0]), m))
+    _roots.sort(key=lambda item: dom._vec_to_index(item[0]))
+    return _roots
@@ -4,12 +4,76 @@ from sympy.core.function import expand
 from sympy.ntheory.primetest import isprime
 from sympy.polys.polytools import LC, Poly, poly
 
+from sympy.ntheory.factor_ import factorint
+
+from array import array
+from collections import OrderedDict
 import random
 
+from sffelements import SFFElement
+
+"""
+    Exp/log tables are built automatically for extension fields of at most
+    TABLE_AUTO_LIMIT elements and on request (SFF.set_tables) up to TABLE_LIMIT.
+"""
+TABLE_AUTO_LIMIT = 2 ** 16
+TABLE_LIMIT = 2 ** 22
+
+"""
+    Maximal number of memoized reductions kept by each domain.
+"""
+REDUCE_CACHE_SIZE = 4096
+
+"""
+    Maximal number of domains kept by cached_sff().
+"""
+DOMAIN_CACHE_SIZE = 256
+
+class LRUCache:
+    """
+        bounded mapping which drops the least recently used entry,
+        counting hits and misses of get()
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize}
+
 class SFF:
     """
         represents a splitted finite field of some polynomials
         over a finite field of which modulus is 'mod'.
+        Each relation is a polynomial in a single variable; a relation in
+        several variables raises a ValueError.
     """
 
     def __init__(self, rel, mod):
@@ -25,7 +89,7 @@ class SFF:
 
         Example:
             a_1 = symbols('a_1') 
-            rel = {'var': a_1, 'rep': a_1 ** 2 - 3, 'deg': 2, 'uni': True}
+            rel = {'var': a_1, 'rep': a_1 ** 2 - 3, 'deg': 2}
 
             self.rel_list = [rel_1, rel_2, ..., rel_n]
             self.mod = p
@@ -42,16 +106,7 @@ class SFF:
             self.is_prime = False
             if not LC(rel.as_poly()) == 1:
                 rel = poly(rel.as_expr() * pow(LC(rel.as_poly()), mod - 2, mod), domain=_dom).as_expr()
-            if len(poly(rel).gens) == 1:
-                self.rel_list.append({'var': poly(rel).gens[0],
-                                      'rep': rel.as_expr(), 
-                                      'deg': poly(rel).degree(), 
-                                      'is_uni': True})
-            else:
-                self.rel_list.append({'var': poly(rel).gens[0], 
-                                      'rep': rel.as_expr(), 
-                                      'deg': poly(rel).degree(), 
-                                      'is_uni': False})
+            self.rel_list.append(_relation(rel))
         elif isinstance(rel, list):
             self.is_prime = False
             if rel == [] or rel == [0] * len(rel):
@@ -62,21 +117,12 @@ class SFF:
                         continue
                     if not LC(_p.as_poly()) == 1:
                         _p = poly(_p * pow(LC(_p.as_poly()), mod - 2, mod), domain=_dom).as_expr()
-                    if len(poly(_p).gens) == 1:
-                        self.rel_list.append({'var': poly(_p).gens[0], 
-                                              'rep': _p.as_expr(), 
-                                              'deg': poly(_p).degree(), 
-                                              'is_uni': True})
-                    else:
-                        self.rel_list.append({'var': poly(_p).gens[0], 
-                                              'rep': _p.as_expr(), 
-                                              'deg': poly(_p).degree(), 
-                                              'is_uni': False})
+                    self.rel_list.append(_relation(_p))
         else: 
             raise ValueError("first argument needs to be 0, an Expr instance or list.")
 
         if isprime(mod):
-            self.mod = mod
+            self.mod = int(mod)
         else:
             raise ValueError("modulus needs to be a prime number")
 
@@ -89,7 +135,7 @@ class SFF:
             _var_list, _degs, _gens = [], [], []
             for _rel in self.rel_list:
                 _degs.append(_rel['deg'])
-                if not _rel['var'] in _var_list and _rel['is_uni']:
+                if not _rel['var'] in _var_list:
                     _var_list.append(_rel['var'])
             self.var_list = _var_list
             self.exdeg = ilcm(1, *_degs)
@@ -102,7 +148,7 @@ class SFF:
             """
             _expr = 1
             for _var in self.var_list:
-                _deg = next(item for item in self.rel_list if item['var'] == _var and item['is_uni'])['deg']
+                _deg = next(item for item in self.rel_list if item['var'] == _var)['deg']
                 _expr_1 = 0
                 for i in range(_deg):
                     _expr_1 += _var ** i
@@ -110,6 +156,63 @@ class SFF:
             _tuple = expand(_expr).as_coeff_add()
             self.gens = tuple([_tuple[0]] + [item for item in _tuple[1]])
 
+        self._key = (self.mod, tuple(rel['rep'] for rel in self.rel_list))
+        self.reduce_cache = LRUCache(REDUCE_CACHE_SIZE)
+        self._init_native()
+
+    def __eq__(self, other):
+        if not isinstance(other, SFF):
+            return False
+        return self is other or self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def cache_info(self):
+        """ hits, misses and size of the memoized reductions """
+        return self.reduce_cache.info()
+
+    def clear_cache(self):
+        self.reduce_cache.clear()
+
+    def _init_native(self):
+        """
+        Instance variables of the native backend:
+            * degs: degrees of the relations of var_list
+            * dim: length of an element vector (product of degs)
+            * zero, one: vectors of 0 and 1
+
+        An element is a tuple of ints in [0, mod) of length dim.
+        The i-th entry is the coefficient of the monomial
+        var_list[0] ** e_0 * ... * var_list[m-1] ** e_(m-1)
+        where i = e_0 + e_1 * degs[0] + ... (mixed radix, var_list[0] lowest).
+        """
+        self.degs, self._rel_tails = [], []
+        for _var in self.var_list:
+            _rel = next(item for item in self.rel_list if item['var'] == _var)
+            _coeffs = [int(c) % self.mod for c in Poly(_rel['rep'], _var).all_coeffs()[::-1]]
+            self.degs.append(len(_coeffs) - 1)
+            self._rel_tails.append(_coeffs[:-1])
+        self.dim = 1
+        self._strides = []
+        for _deg in self.degs:
+            self._strides.append(self.dim)
+            self.dim *= _deg
+        self._exps = [tuple((i // s) % d for s, d in zip(self._strides, self.degs)) for i in range(self.dim)]
+        self.zero = (0,) * self.dim
+        self.one = (1,) + (0,) * (self.dim - 1)
+        self._generator = None
+        self._order_factors, self._is_field = None, None
+        self._frobenius = {}
+        self._exp, self._log = None, None
+        self.use_tables = self._can_use_tables() and self.num <= TABLE_AUTO_LIMIT
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_exp'], state['_log'] = None, None
+        state['reduce_cache'] = LRUCache(self.reduce_cache.maxsize)
+        return state
+
     def __str__(self):
         return self.as_SFF()
 
@@ -126,7 +229,7 @@ class SFF:
         if self.is_prime:
             return self.as_sympy_FF()
         else:
-            return "FiniteField(%s**%s) splitting %s" % (self.mod, self.exdeg, [rel['rep'] for rel in self.rel_list if rel['is_uni']])
+            return "FiniteField(%s**%s) splitting %s" % (self.mod, self.exdeg, [rel['rep'] for rel in self.rel_list])
 
     def rel_deg(self, **args):
         if not args:
@@ -171,14 +274,13 @@ class SFF:
         if i > self.num ** n:
             raise ValueError
         _list = []
-        for d in range(n)[::-1]:
-            _list.insert(0, self.element(int(i / (self.num ** d))))
-            i %= self.num ** d
+        for _ in range(n):
+            i, j = divmod(i, self.num)
+            _list.append(self.element(j))
         return tuple(_list)
 
     def point_as_dict(self, i, gens):
-        n = len(gens)
-        return dict((gens[d], self.point(n, i)[d]) for d in range(n))
+        return dict(zip(gens, self.point(len(gens), i)))
 
     def points_iter(self, n):
         for i in range(self.num ** n):
@@ -194,10 +296,572 @@ class SFF:
         for i in range(self.num ** n):
             yield (poly, self.point_as_dict(i, gens), queue)
 
+    def point_vec(self, n, i):
+        """
+        i-th point of the n-dimensional affine space as element vectors,
+        coordinate k is the element of index (i // num ** k) % num
+        """
+        if i >= self.num ** n:
+            raise ValueError("point index %s out of range" % i)
+        _point = []
+        for _ in range(n):
+            i, j = divmod(i, self.num)
+            _point.append(self._index_to_vec(j))
+        return tuple(_point)
+
+    def point_index(self, point):
+        """ inverse of point_vec """
+        i = 0
+        for _vec in reversed(point):
+            i = i * self.num + self._vec_to_index(_vec)
+        return i
+
+    """
+        Gray code enumeration.
+        The i-th point of the n-dimensional affine space in Gray order has
+        the digits g_k = (b_k - b_(k+1)) % mod, where b_k are the base mod
+        digits of i, digit k being entry k % dim of coordinate k // dim.
+        Consecutive points differ by adding one basis vector to one coordinate.
+    """
+
+    def gray_point(self, n, i):
+        if i >= self.num ** n:
+            raise ValueError("point index %s out of range" % i)
+        _digits = self._gray_digits(n, i)[1]
+        return tuple(tuple(_digits[k * self.dim:(k + 1) * self.dim]) for k in range(n))
+
+    def _gray_digits(self, n, i):
+        p = self.mod
+        _counter = array('q', bytes(8 * (n * self.dim + 1)))
+        for k in range(n * self.dim):
+            i, _counter[k] = divmod(i, p)
+        _digits = array('q', ((_counter[k] - _counter[k + 1]) % p for k in range(n * self.dim)))
+        return _counter, _digits
+
+    def gray_points_iter(self, n, start=0, stop=None):
+        """ yields points of index start, ..., stop - 1 in Gray order as tuples of vectors """
+        _total = self.num ** n
+        stop = _total if stop is None else min(stop, _total)
+        if start >= stop:
+            return
+        p, dim = self.mod, self.dim
+        _counter, _digits = self._gray_digits(n, start)
+        _point = [tuple(_digits[k * dim:(k + 1) * dim]) for k in range(n)]
+        yield tuple(_point)
+        for _ in range(start + 1, stop):
+            j = 0
+            while _counter[j] == p - 1:
+                _counter[j] = 0
+                j += 1
+            _counter[j] += 1
+            _digits[j] = c = (_digits[j] + 1) % p
+            k, t = divmod(j, dim)
+            _vec = _point[k]
+            _point[k] = _vec[:t] + (c,) + _vec[t + 1:]
+            yield tuple(_point)
+
+    def gray_elements_iter(self, start=0, stop=None):
+        """ yields element vectors of index start, ..., stop - 1 in Gray order """
+        for _point in self.gray_points_iter(1, start, stop):
+            yield _point[0]
+
     def extend(self, rep):
         rel_ = [rel['rep'] for rel in self.rel_list]
         rel_.append(rep)
-        return sff(rel_, self.mod)
+        return cached_sff(rel_, self.mod)
+
+    """
+        Native arithmetic on element vectors.
+        Elements are tuples of ints described in _init_native().
+    """
+
+    def from_int(self, n):
+        return (int(n) % self.mod,) + (0,) * (self.dim - 1)
+
+    def from_sympy(self, f):
+        """ convert an expression in var_list into an element vector """
+        if isinstance(f, int) or isinstance(f, Integer):
+            return self.from_int(f)
+        f = f.as_expr()
+        if f.is_Integer:
+            return self.from_int(f)
+        if f.is_Rational:
+            return self.mul(self.from_int(f.p), self.inv(self.from_int(f.q)))
+        _key = ('vec', f)
+        _vec = self.reduce_cache.get(_key)
+        if _vec is None:
+            _vec = self._from_expr(f)
+            self.reduce_cache.put(_key, _vec)
+        return _vec
+
+    def _from_expr(self, f):
+        _vec = self.zero
+        for monom, coeff in Poly(f, *self.var_list).terms():
+            if coeff.is_Integer:
+                _term = self.from_int(coeff)
+            else:
+                _term = self.mul(self.from_int(coeff.p), self.inv(self.from_int(coeff.q)))
+            for t, e in enumerate(monom):
+                _term = self.mul(_term, self._gen_power(t, e))
+            _vec = self.add(_vec, _term)
+        return _vec
+
+    def convert(self, f):
+        """ convert int, Expr, element vector or SFFElement into an element vector """
+        if isinstance(f, tuple):
+            if not len(f) == self.dim:
+                raise ValueError("element vector needs length %s, not %s" % (self.dim, len(f)))
+            return f
+        if isinstance(f, SFFElement):
+            if not f.dom == self:
+                raise ValueError("the element belongs to a different domain")
+            return f.vec
+        if isinstance(f, int) or isinstance(f, Integer) or isinstance(f, Expr):
+            return self.from_sympy(f)
+        raise TypeError("cannot convert %s into an element of %s" % (f.__class__.__name__, self.as_SFF()))
+
+    def to_sympy(self, vec):
+        """ convert an element vector into an expression with symmetric coefficients """
+        _half = self.mod // 2
+        _expr = 0
+        for i, c in enumerate(vec):
+            if c == 0:
+                continue
+            if c > _half:
+                c -= self.mod
+            _term = Integer(c)
+            for _var, e in zip(self.var_list, self._exps[i]):
+                _term *= _var ** e
+            _expr += _term
+        return Integer(_expr) if isinstance(_expr, int) else _expr
+
+    def is_int_vec(self, vec):
+        """ True if vec lies in the prime field """
+        return not any(vec[1:])
+
+    def add(self, u, v):
+        p = self.mod
+        return tuple((a + b) % p for a, b in zip(u, v))
+
+    def sub(self, u, v):
+        p = self.mod
+        return tuple((a - b) % p for a, b in zip(u, v))
+
+    def neg(self, u):
+        p = self.mod
+        return tuple(-a % p for a in u)
+
+    def mul_int(self, u, n):
+        p = self.mod
+        n %= p
+        return tuple(a * n % p for a in u)
+
+    def mul(self, u, v):
+        if self.use_tables and (self._exp is not None or self._tables_ready()):
+            if not any(u) or not any(v):
+                return self.zero
+            _log = self._log
+            return self._index_to_vec(self._exp[(_log[self._vec_to_index(u)] + _log[self._vec_to_index(v)]) % (self.num - 1)])
+        return self._mul_vec(u, v)
+
+    def _mul_vec(self, u, v):
+        """ multiplication of vectors without tables """
+        p = self.mod
+        if self.dim == 1:
+            return (u[0] * v[0] % p,)
+        if len(self.degs) == 1:
+            d = self.degs[0]
+            _prod = [0] * (2 * d - 1)
+            for i, a in enumerate(u):
+                if a:
+                    for j, b in enumerate(v):
+                        if b:
+                            _prod[i + j] += a * b
+            return self._reduce_prod(_prod)
+        _prod = {}
+        for i, a in enumerate(u):
+            if a:
+                for j, b in enumerate(v):
+                    if b:
+                        e = tuple(s + t for s, t in zip(self._exps[i], self._exps[j]))
+                        _prod[e] = _prod.get(e, 0) + a * b
+        return self._reduce_exps(_prod)
+
+    def _reduce_prod(self, prod):
+        """
+        reduce a list of at most 2 * dim - 1 unreduced ints, the product of two
+        vectors of a domain with one relation, into a vector (modified in place)
+        """
+        p = self.mod
+        d, tail = self.degs[0], self._rel_tails[0]
+        for k in range(len(prod) - 1, d - 1, -1):
+            c = prod[k] % p
+            if c:
+                for j, r in enumerate(tail):
+                    if r:
+                        prod[k - d + j] -= c * r
+        return tuple(c % p for c in prod[:d]) + (0,) * (d - len(prod))
+
+    def _reduce_exps(self, terms):
+        """ reduce a dict {exponent tuple: int} by the relations into a vector """
+        p = self.mod
+        for t, (d, tail) in enumerate(zip(self.degs, self._rel_tails)):
+            _high = max((e[t] for e in terms), default=0)
+            for k in range(_high, d - 1, -1):
+                for e in [e for e in terms if e[t] == k]:
+                    c = terms.pop(e) % p
+                    if c == 0:
+                        continue
+                    for j, r in enumerate(tail):
+                        if r:
+                            e_ = e[:t] + (k - d + j,) + e[t + 1:]
+                            terms[e_] = terms.get(e_, 0) - c * r
+        _vec = [0] * self.dim
+        for e, c in terms.items():
+            i = sum(s * k for s, k in zip(self._strides, e))
+            _vec[i] = (_vec[i] + c) % p
+        return tuple(_vec)
+
+    def _gen_power(self, t, e):
+        """ vector of var_list[t] ** e """
+        if e < self.degs[t]:
+            _vec = [0] * self.dim
+            _vec[e * self._strides[t]] = 1
+            return tuple(_vec)
+        if self.degs[t] == 1:
+            return self.pow(self.from_int(-self._rel_tails[t][0]), e)
+        return self.pow(self._gen_power(t, 1), e)
+
+    def pow(self, u, e):
+        if self.use_tables and (self._exp is not None or self._tables_ready()):
+            if not any(u):
+                if e < 0:
+                    raise ZeroDivisionError("zero has no inverse in %s" % self.as_SFF())
+                return self.one if e == 0 else self.zero
+            return self._index_to_vec(self._exp[self._log[self._vec_to_index(u)] * e % (self.num - 1)])
+        return self._pow_vec(u, e)
+
+    def _pow_vec(self, u, e):
+        """ powering of vectors by repeated squaring without tables """
+        if self.dim == 1:
+            if e < 0 and u[0] == 0:
+                raise ZeroDivisionError("zero has no inverse in %s" % self.as_SFF())
+            return (pow(u[0], e, self.mod),)
+        if e < 0:
+            return self._pow_vec(self.inv(u), -e)
+        _pow, _base = self.one, u
+        while e:
+            if e & 1:
+                _pow = self._mul_vec(_pow, _base)
+            e >>= 1
+            if e:
+                _base = self._mul_vec(_base, _base)
+        return _pow
+
+    def inv(self, u):
+        """
+        inverse by a table lookup, or by extended Euclid against the relation
+        (linear algebra when there are several relations)
+        """
+        if u == self.zero:
+            raise ZeroDivisionError("zero has no inverse in %s" % self.as_SFF())
+        if self.dim == 1:
+            return (pow(u[0], self.mod - 2, self.mod),)
+        if self.use_tables and (self._exp is not None or self._tables_ready()):
+            return self._index_to_vec(self._exp[-self._log[self._vec_to_index(u)] % (self.num - 1)])
+        if len(self.degs) == 1:
+            return self._inv_euclid(u)
+        return self._inv_linear(u)
+
+    def _inv_euclid(self, u):
+        p = self.mod
+        r0, r1 = self._rel_tails[0] + [1], _zp_strip(list(u))
+        s0, s1 = [], [1]
+        while len(r1) > 1:
+            q, r = _zp_divmod(r0, r1, p)
+            r0, r1 = r1, r
+            s0, s1 = s1, _zp_sub(s0, _zp_mul(q, s1, p), p)
+        if not r1:
+            raise ZeroDivisionError("%s is not invertible in %s" % (self.to_sympy(u), self.as_SFF()))
+        c = pow(r1[0], p - 2, p)
+        return tuple(a * c % p for a in s1) + (0,) * (self.dim - len(s1))
+
+    def _inv_linear(self, u):
+        """ solve u * v == 1 as a linear system over the prime field """
+        p, n = self.mod, self.dim
+        _cols = [self._mul_vec(u, tuple(int(i == j) for j in range(n))) for i in range(n)]
+        _rows = [[_col[i] for _col in _cols] + [int(i == 0)] for i in range(n)]
+        for k in range(n):
+            _pivot = next((i for i in range(k, n) if _rows[i][k]), None)
+            if _pivot is None:
+                raise ZeroDivisionError("%s is not invertible in %s" % (self.to_sympy(u), self.as_SFF()))
+            _rows[k], _rows[_pivot] = _rows[_pivot], _rows[k]
+            c = pow(_rows[k][k], p - 2, p)
+            _rows[k] = [a * c % p for a in _rows[k]]
+            for i in range(n):
+                if not i == k and _rows[i][k]:
+                    c = _rows[i][k]
+                    _rows[i] = [(a - c * b) % p for a, b in zip(_rows[i], _rows[k])]
+        return tuple(row[n] for row in _rows)
+
+    def batch_inv(self, vecs):
+        """ inverses of a list of vectors with a single inversion (Montgomery's trick) """
+        _prefix = []
+        _acc = self.one
+        for u in vecs:
+            if not any(u):
+                raise ZeroDivisionError("zero has no inverse in %s" % self.as_SFF())
+            _prefix.append(_acc)
+            _acc = self.mul(_acc, u)
+        _inv = self.inv(_acc)
+        _invs = [None] * len(vecs)
+        for i in range(len(vecs) - 1, -1, -1):
+            _invs[i] = self.mul(_inv, _prefix[i])
+            _inv = self.mul(_inv, vecs[i])
+        return _invs
+
+    """
+        Frobenius map x -> x ** mod.
+        It is linear over the prime field, so x ** (mod ** k) is a matrix
+        acting on the element vector. The matrix of the k-th power is kept
+        in _frobenius[k] once computed.
+    """
+
+    def frobenius_matrix(self, k=1):
+        """ dim x dim matrix (list of rows) of x -> x ** (mod ** k) """
+        if self.mod ** self.dim == self.num:
+            k %= self.dim
+        if not k in self._frobenius:
+            p = self.mod
+            if k == 0:
+                _mat = [[int(i == j) for j in range(self.dim)] for i in range(self.dim)]
+            elif k == 1:
+                _cols = [self._pow_vec(tuple(int(i == j) for j in range(self.dim)), p) for i in range(self.dim)]
+                _mat = [[_col[i] for _col in _cols] for i in range(self.dim)]
+            else:
+                _half = self.frobenius_matrix(k // 2)
+                _mat = _mat_mul(_half, _half, p)
+                if k % 2:
+                    _mat = _mat_mul(self.frobenius_matrix(1), _mat, p)
+            self._frobenius[k] = _mat
+        return self._frobenius[k]
+
+    def frobenius(self, elem, k=1):
+        """
+        elem ** (mod ** k) for an element vector, SFFElement or expression,
+        returned in the same form as elem
+        """
+        if self.is_prime:
+            return elem
+        _vec = self.convert(elem)
+        p = self.mod
+        _vec = tuple(sum(m * c for m, c in zip(row, _vec)) % p for row in self.frobenius_matrix(k))
+        if isinstance(elem, tuple):
+            return _vec
+        if isinstance(elem, SFFElement):
+            return SFFElement.from_vec(_vec, self)
+        return self.to_sympy(_vec)
+
+    def conjugates(self, elem):
+        """ list of elem ** (mod ** k) for k in range(exdeg) """
+        return [self.frobenius(elem, k) for k in range(self.exdeg)]
+
+    """
+        Primitive elements.
+        q - 1 is factored once per domain, then g is primitive
+        iff g ** ((q - 1) // l) != 1 for every prime l dividing q - 1.
+    """
+
+    def order_factors(self):
+        """ factorization {prime: exponent} of num - 1 """
+        if self._order_factors is None:
+            self._order_factors = factorint(self.num - 1)
+        return self._order_factors
+
+    def is_field(self):
+        """ True if the relations are irreducible and of coprime degrees """
+        if self._is_field is None:
+            self._is_field = self.mod ** self.dim == self.num
+            for _var in self.var_list:
+                if not self._is_field:
+                    break
+                _rel = next(item for item in self.rel_list if item['var'] == _var)
+                self._is_field = Poly(_rel['rep'], _var, modulus=self.mod).is_irreducible
+        return self._is_field
+
+    def is_primitive_vec(self, vec):
+        if not self.is_field():
+            raise ValueError("%s has no primitive element" % self.as_SFF())
+        if not any(vec):
+            return False
+        _order = self.num - 1
+        return all(not self._pow_vec(vec, _order // l) == self.one for l in self.order_factors())
+
+    def _primitive_vec(self):
+        """ a primitive element vector found by random sampling, kept once found """
+        if self._generator is None:
+            if not self.is_field():
+                raise ValueError("%s has no primitive element" % self.as_SFF())
+            while True:
+                _vec = self._index_to_vec(random.randint(1, self.num - 1))
+                if self.is_primitive_vec(_vec):
+                    self._generator = _vec
+                    break
+        return self._generator
+
+    def primitive_element(self):
+        return SFFElement.from_vec(self._primitive_vec(), self)
+
+    def primitive_elements_iter(self):
+        """ yields all primitive elements as g ** k with gcd(k, num - 1) == 1 """
+        g = self._primitive_vec()
+        _order = self.num - 1
+        _primes = list(self.order_factors())
+        _vec = g
+        for k in range(1, _order):
+            if all(k % l for l in _primes):
+                yield SFFElement.from_vec(_vec, self)
+            _vec = self._mul_vec(_vec, g)
+
+    def primitive_elements(self):
+        return list(self.primitive_elements_iter())
+
+    """
+        Exp/log tables.
+        Elements are numbered by index = vec[0] + vec[1] * mod + ... ,
+        _exp[k] is the index of g ** k for a primitive element g
+        and _log[index] is k.
+    """
+
+    def _can_use_tables(self):
+        return self.dim > 1 and self.mod ** self.dim == self.num
+
+    def set_tables(self, flag=True):
+        """ switch exp/log tables on or off, they are built at the first use """
+        if flag:
+            if not self._can_use_tables():
+                raise ValueError("%s cannot use exp/log tables" % self.as_SFF())
+            if self.num > TABLE_LIMIT:
+                raise ValueError("%s is too large for exp/log tables" % self.as_SFF())
+        self.use_tables = flag
+
+    def _vec_to_index(self, vec):
+        p = self.mod
+        i = 0
+        for c in reversed(vec):
+            i = i * p + c
+        return i
+
+    def _index_to_vec(self, i):
+        p = self.mod
+        _vec = []
+        for _ in range(self.dim):
+            i, c = divmod(i, p)
+            _vec.append(c)
+        return tuple(_vec)
+
+    def _tables_ready(self):
+        """ build the tables, switching them off if the domain is not a field """
+        try:
+            self._build_tables()
+        except ValueError:
+            self.use_tables = False
+            return False
+        return True
+
+    def _build_tables(self):
+        _order = self.num - 1
+        g = self._primitive_vec()
+        _exp = array('q', bytes(8 * _order))
+        _log = array('q', bytes(8 * self.num))
+        _vec = self.one
+        for k in range(_order):
+            i = self._vec_to_index(_vec)
+            _exp[k] = i
+            _log[i] = k
+            _vec = self._mul_vec(_vec, g)
+        self._exp, self._log = _exp, _log
 
 def sff(rel, mod):
-    return SFF(rel, mod)
\ No newline at end of file
+    return SFF(rel, mod)
+
+"""
+    Domains built by cached_sff() are shared by their monic relations,
+    so a recurring extension keeps its Frobenius matrices, tables and
+    memoized reductions. Each process has its own cache.
+"""
+
+_domains = LRUCache(DOMAIN_CACHE_SIZE)
+
+def cached_sff(rel, mod):
+    """ sff(rel, mod), reusing a domain built before from the same relations """
+    key = (mod, _canonical_rels(rel, mod))
+    dom = _domains.get(key)
+    if dom is None:
+        dom = sff(rel, mod)
+        _domains.put(key, dom)
+    return dom
+
+def _canonical_rels(rel, mod):
+    if not isinstance(rel, list):
+        rel = [rel]
+    return tuple(poly(_p, modulus=mod).monic().as_expr() for _p in rel if not _p == 0)
+
+def _relation(rel):
+    """ entry of SFF.rel_list for a monic univariate relation """
+    _poly = poly(rel)
+    if not len(_poly.gens) == 1:
+        raise ValueError("relations need to be univariate, not %s" % rel)
+    return {'var': _poly.gens[0], 'rep': rel.as_expr(), 'deg': _poly.degree()}
+
+def domain_cache_info():
+    """ hits, misses and size of the domains kept by cached_sff() """
+    return _domains.info()
+
+def clear_domain_cache():
+    _domains.clear()
+
+"""
+    Polynomials over the prime field as lists of ints from degree 0.
+"""
+
+def _zp_strip(f):
+    while f and f[-1] == 0:
+        f.pop()
+    return f
+
+def _zp_sub(f, g, p):
+    _sub = list(f) + [0] * (len(g) - len(f))
+    for i, c in enumerate(g):
+        _sub[i] = (_sub[i] - c) % p
+    return _zp_strip(_sub)
+
+def _zp_mul(f, g, p):
+    if not f or not g:
+        return []
+    _mul = [0] * (len(f) + len(g) - 1)
+    for i, a in enumerate(f):
+        if a:
+            for j, b in enumerate(g):
+                _mul[i + j] += a * b
+    return _zp_strip([c % p for c in _mul])
+
+def _zp_divmod(f, g, p):
+    dg = len(g) - 1
+    _rem = list(f)
+    if len(f) <= dg:
+        return [], _rem
+    _inv = pow(g[-1], p - 2, p)
+    _div = [0] * (len(f) - dg)
+    for k in range(len(f) - 1, dg - 1, -1):
+        c = _rem[k] * _inv % p
+        if c:
+            _div[k - dg] = c
+            for j in range(dg + 1):
+                _rem[k - dg + j] = (_rem[k - dg + j] - c * g[j]) % p
+    return _zp_strip(_div), _zp_strip(_rem[:dg])
+
+def _mat_mul(A, B, p):
+    """ product of square matrices over the prime field """
+    _cols = list(zip(*B))
+    return [[sum(a * b for a, b in zip(row, col)) % p for col in _cols] for row in A]
@@ -0,0 +1,132 @@
+from sympy.core.numbers import Integer
+from sympy.core.expr import Expr
+
+class SFFElement:
+    """
+    represents an element of a SFF as a vector of integers modulo 'mod'
+
+    Examples
+    ========
+
+    >>> a = symbols('a')
+    >>> dom = sff(a ** 2 - 2, 5)
+    >>> u = sffelement(a + 1, dom)
+    >>> u * u
+    SFFElement(2*a - 2, FiniteField(5**2) splitting [a**2 - 2])
+
+    """
+
+    __slots__ = ('vec', 'dom')
+
+    def __init__(self, rep, dom):
+        """
+            Instance variables:
+            * vec: tuple of ints of length dom.dim (see SFF._init_native)
+            * dom: domain field which is a SFF instance
+        """
+        self.dom = dom
+        self.vec = dom.convert(rep)
+
+    @classmethod
+    def from_vec(cls, vec, dom):
+        obj = cls.__new__(cls)
+        obj.vec = vec
+        obj.dom = dom
+        return obj
+
+    def __repr__(self):
+        return "%s(%s, %s)" % (self.__class__.__name__, self.as_expr(), self.dom.as_SFF())
+
+    def __str__(self):
+        return str(self.as_expr())
+
+    def _coerce(f, g):
+        if isinstance(g, SFFElement):
+            if not f.dom == g.dom:
+                raise ValueError("argument elements have different domains")
+            return g.vec
+        if isinstance(g, int) or isinstance(g, Integer) or isinstance(g, Expr):
+            return f.dom.convert(g)
+        return None
+
+    def __add__(f, g):
+        g = f._coerce(g)
+        if g is None:
+            return NotImplemented
+        return f.from_vec(f.dom.add(f.vec, g), f.dom)
+
+    __radd__ = __add__
+
+    def __sub__(f, g):
+        g = f._coerce(g)
+        if g is None:
+            return NotImplemented
+        return f.from_vec(f.dom.sub(f.vec, g), f.dom)
+
+    def __rsub__(f, g):
+        g = f._coerce(g)
+        if g is None:
+            return NotImplemented
+        return f.from_vec(f.dom.sub(g, f.vec), f.dom)
+
+    def __neg__(f):
+        return f.from_vec(f.dom.neg(f.vec), f.dom)
+
+    def __mul__(f, g):
+        g = f._coerce(g)
+        if g is None:
+            return NotImplemented
+        return f.from_vec(f.dom.mul(f.vec, g), f.dom)
+
+    __rmul__ = __mul__
+
+    def __truediv__(f, g):
+        g = f._coerce(g)
+        if g is None:
+            return NotImplemented
+        return f.from_vec(f.dom.mul(f.vec, f.dom.inv(g)), f.dom)
+
+    def __rtruediv__(f, g):
+        g = f._coerce(g)
+        if g is None:
+            return NotImplemented
+        return f.from_vec(f.dom.mul(g, f.dom.inv(f.vec)), f.dom)
+
+    def __pow__(f, e):
+        if not isinstance(e, int) and not isinstance(e, Integer):
+            raise TypeError("second argument needs to be an integer, not %s" % e.__class__.__name__)
+        return f.from_vec(f.dom.pow(f.vec, int(e)), f.dom)
+
+    def __eq__(f, g):
+        g = f._coerce(g)
+        if g is None:
+            return False
+        return f.vec == g
+
+    def __hash__(self):
+        return hash(self.vec)
+
+    def __bool__(self):
+        return any(self.vec)
+
+    def inverse(self):
+        return self.from_vec(self.dom.inv(self.vec), self.dom)
+
+    def as_expr(self):
+        return self.dom.to_sympy(self.vec)
+
+    def is_zero(self):
+        return not any(self.vec)
+
+def batch_inverse(elems):
+    """ inverses of a list of SFFElements of one domain with a single inversion """
+    if not elems:
+        return []
+    dom = elems[0].dom
+    if any(not e.dom == dom for e in elems):
+        raise ValueError("argument elements have different domains")
+    return [SFFElement.from_vec(v, dom) for v in dom.batch_inv([e.vec for e in elems])]
+
+def sffelement(rep, dom):
+    """Constructor method for SFFElement"""
+    return SFFElement(rep, dom)
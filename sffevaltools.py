@@ -0,0 +1,220 @@
+"""
+    Batch evaluation of sffpolys over points of SFF ** n with NumPy.
+
+    A batch of N elements is an int64 array of shape (N, dim) holding
+    element vectors (see SFF._init_native). Points are numbered as in
+    SFF.point_vec, coordinate k belonging to the k-th variable of the sffpoly.
+
+    SFFEvaluator is the pure Python counterpart for repeated evaluation
+    at scattered points, such as the candidates of resolution.sing().
+"""
+
+from sffdomains import LRUCache, DOMAIN_CACHE_SIZE
+from sffelements import SFFElement
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+"""
+    Number of points evaluated at once by zero_mask_chunks().
+"""
+CHUNK_SIZE = 2 ** 16
+
+_tensors = LRUCache(DOMAIN_CACHE_SIZE)
+
+def _check_numpy():
+    if np is None:
+        raise ImportError("batch evaluation needs numpy")
+
+def _tensor(dom):
+    """ T[i, j] is the vector of basis_i * basis_j """
+    _tensor = _tensors.get(dom)
+    if _tensor is None:
+        n = dom.dim
+        basis = [tuple(int(i == j) for j in range(n)) for i in range(n)]
+        _tensor = np.array([[dom._mul_vec(u, v) for v in basis] for u in basis], dtype=np.int64)
+        _tensors.put(dom, _tensor)
+    return _tensor
+
+def batch_mul(u, v, dom):
+    p = dom.mod
+    if dom.dim == 1:
+        return u * v % p
+    uv = u[:, :, None] * v[:, None, :] % p
+    return np.tensordot(uv, _tensor(dom), axes=([1, 2], [0, 1])) % p
+
+def batch_elements(index, dom):
+    """ element vectors of an array of element indices """
+    p = dom.mod
+    _vecs = np.empty((len(index), dom.dim), dtype=np.int64)
+    for t in range(dom.dim):
+        index, _vecs[:, t] = np.divmod(index, p)
+    return _vecs
+
+def batch_points(start, stop, n, dom):
+    """ list of n coordinate batches for the points start, ..., stop - 1 """
+    _index = np.arange(start, stop, dtype=np.int64)
+    _coords = []
+    for _ in range(n):
+        _index, j = np.divmod(_index, dom.num)
+        _coords.append(batch_elements(j, dom))
+    return _coords
+
+def batch_eval(f, coords):
+    """ values of f at the points given by coordinate batches of its variables """
+    _check_numpy()
+    if not len(coords) == len(f.var):
+        raise ValueError("need %s coordinate batches, not %s" % (len(f.var), len(coords)))
+    N = len(coords[0]) if coords else 1
+    return _horner(f.terms, len(f.var) - 1, coords, N, f.dom)
+
+def _horner(terms, k, coords, N, dom):
+    """ Horner scheme in the k-th variable over Horner schemes in the lower ones """
+    if k < 0:
+        return np.broadcast_to(np.array(terms.get((), dom.zero), dtype=np.int64), (N, dom.dim))
+    _groups = {}
+    for e, c in terms.items():
+        _groups.setdefault(e[k], {})[e[:k]] = c
+    p = dom.mod
+    _acc = None
+    for d in range(max(_groups), -1, -1):
+        if _acc is not None:
+            _acc = batch_mul(_acc, coords[k], dom)
+        if d in _groups:
+            _val = _horner(_groups[d], k - 1, coords, N, dom)
+            _acc = _val if _acc is None else (_acc + _val) % p
+    return _acc
+
+def zero_mask(f, start=0, stop=None):
+    """ boolean array telling which of the points start, ..., stop - 1 are zeros of f """
+    _check_numpy()
+    n = len(f.var)
+    _total = f.dom.num ** n
+    if _total >= 2 ** 63:
+        raise ValueError("too many points for int64 indices")
+    stop = _total if stop is None else min(stop, _total)
+    if stop <= start:
+        return np.zeros(0, dtype=bool)
+    if not f.terms:
+        return np.ones(stop - start, dtype=bool)
+    _vals = batch_eval(f, batch_points(start, stop, n, f.dom))
+    return ~np.asarray(_vals).any(axis=1)
+
+def zero_mask_chunks(f, chunk=CHUNK_SIZE):
+    """ yields (start, mask) over all points of SFF ** n chunk by chunk """
+    _total = f.dom.num ** len(f.var)
+    for start in range(0, _total, chunk):
+        yield start, zero_mask(f, start, start + chunk)
+
+class SFFEvaluator:
+    """
+    compiled evaluator of an sffpoly and its first partial derivatives
+
+    The terms are arranged once into nested Horner schemes, the last
+    variable outermost. Each evaluation walks them a single time and
+    carries the derivative of every Horner step along, so the value and
+    all partials share their multiplications by the coordinates.
+
+    Examples
+    ========
+
+    >>> x, y = symbols('x y')
+    >>> f = sffpoly(y ** 2 - x ** 3, sff(0, 7))
+    >>> ev = f.compile()
+    >>> ev.is_singular({x: 0, y: 0})
+    True
+
+    """
+
+    def __init__(self, var, terms, dom):
+        """
+            Instance variables:
+            * var: variables in the order of the point coordinates
+            * dom: domain field which is a SFF instance
+            * _scheme: nested lists of Horner coefficients, highest degree
+                       first, None for missing degrees and element vectors
+                       in the innermost level
+        """
+        self.var = list(var)
+        self.dom = dom
+        self._scheme = _compile_horner(terms, len(self.var) - 1, dom)
+
+    def __repr__(self):
+        return "%s(%s, %s)" % (self.__class__.__name__, self.var, self.dom.as_SFF())
+
+    def _point(self, point):
+        """ coordinate vectors of a dict {var: value} or a sequence in the order of var """
+        dom = self.dom
+        if isinstance(point, dict):
+            try:
+                point = [point[v] for v in self.var]
+            except KeyError as e:
+                raise ValueError("no value for the variable %s" % e.args[0])
+        elif not len(point) == len(self.var):
+            raise ValueError("need %s coordinates, not %s" % (len(self.var), len(point)))
+        return [dom.convert(c) for c in point]
+
+    def eval_vec(self, point):
+        """ value at point as an element vector """
+        return _eval_horner(self._scheme, len(self.var) - 1, self._point(point), self.dom, False)[0]
+
+    def eval_with_partials_vec(self, point):
+        """ (value, [partial derivatives in the order of var]) as element vectors """
+        return _eval_horner(self._scheme, len(self.var) - 1, self._point(point), self.dom, True)
+
+    def __call__(self, point):
+        return SFFElement.from_vec(self.eval_vec(point), self.dom)
+
+    def eval_with_partials(self, point):
+        _val, _grad = self.eval_with_partials_vec(point)
+        return SFFElement.from_vec(_val, self.dom), [SFFElement.from_vec(g, self.dom) for g in _grad]
+
+    def batch(self, points, partials=True):
+        """ list of the results of eval_with_partials_vec (eval_vec without partials) at points """
+        k = len(self.var) - 1
+        _batch = [_eval_horner(self._scheme, k, self._point(point), self.dom, partials) for point in points]
+        return _batch if partials else [v for v, _ in _batch]
+
+    def is_singular(self, point):
+        """ whether the value and all partial derivatives vanish at point """
+        _val, _grad = self.eval_with_partials_vec(point)
+        return not any(_val) and not any(any(g) for g in _grad)
+
+def _compile_horner(terms, k, dom):
+    if k < 0:
+        return terms.get((), dom.zero)
+    _groups = {}
+    for e, c in terms.items():
+        _groups.setdefault(e[k], {})[e[:k]] = c
+    if not _groups:
+        return []
+    return [_compile_horner(_groups[d], k - 1, dom) if d in _groups else None
+            for d in range(max(_groups), -1, -1)]
+
+def _eval_horner(scheme, k, point, dom, partials):
+    """
+    (value, gradient in the variables 0, ..., k) of a Horner scheme;
+    the gradient is [] when partials is False
+    """
+    if k < 0:
+        return scheme, []
+    x = point[k]
+    _val = dom.zero
+    _dx = dom.zero
+    _grad = [dom.zero] * k if partials else []
+    for i, sub in enumerate(scheme):
+        if i:
+            if partials:
+                _dx = dom.add(dom.mul(_dx, x), _val)
+                _grad = [dom.mul(g, x) for g in _grad]
+            _val = dom.mul(_val, x)
+        if sub is not None:
+            v, g = _eval_horner(sub, k - 1, point, dom, partials)
+            _val = dom.add(_val, v)
+            if partials:
+                _grad = [dom.add(a, b) for a, b in zip(_grad, g)]
+    if partials:
+        _grad.append(_dx)
+    return _val, _grad
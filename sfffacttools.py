@@ -1,73 +1,150 @@
-from sympy.polys.polytools import Poly
-from sffpolytools import sffpoly, lc, SFFPoly, SFFQuotientPoly, sffquotientpoly
+from math import gcd
+
+from sympy.core.symbol import Dummy, Symbol
+from sffdomains import sff, LRUCache, DOMAIN_CACHE_SIZE
+from sffpolytools import sffconst, SFFPoly
+from sffelements import SFFElement
+from sffdensetools import (dup_edf, dup_eval, dup_factor_list, dup_gcd, dup_gcdex, dup_interpolate, dup_invert,
+                           dup_monic, dup_random, dup_resultant, dup_sqf_list, dup_strip)
+from multiprocessingtools import pool_starmap
+
+def _check_uni(f, name):
+	if not isinstance(f, SFFPoly):
+		raise TypeError("needed a SFFPoly object, not %s" % f.__class__.__name__)
+	if not f.is_uni and not f.is_const:
+		raise TypeError("cannot %s multivariate polynomial" % name)
+
+def _common_var(f, g):
+	_check_uni(f, "gcd")
+	_check_uni(g, "gcd")
+	if not f.dom == g.dom:
+		raise ValueError("argument sffpolys have different domains")
+	if f.is_uni and g.is_uni and not f.var[0] == g.var[0]:
+		raise ValueError("cannot take gcd of polynomials which have different variables")
+	return (f.var + g.var)[0] if f.var or g.var else None
 
 def sffgcd(f, g):
-	q = f % g
-	if q == 0:
-		return g
-	else:
-		return sffgcd(g, q)
+	""" monic greatest common divisor of univariate sffpolys """
+	var = _common_var(f, g)
+	return SFFPoly.from_dense(dup_gcd(f.to_dense(), g.to_dense(), f.dom), var, f.dom)
+
+def sffgcdex(f, g):
+	""" returns (s, t, h) with s * f + t * g == h == sffgcd(f, g) """
+	var = _common_var(f, g)
+	s, t, h = dup_gcdex(f.to_dense(), g.to_dense(), f.dom)
+	return tuple(SFFPoly.from_dense(k, var, f.dom) for k in (s, t, h))
+
+def sffinvert(f, g):
+	""" inverse of f modulo g """
+	var = _common_var(f, g)
+	return SFFPoly.from_dense(dup_invert(f.to_dense(), g.to_dense(), f.dom), var, f.dom)
+
+def _from_dense_list(f, _list):
+	var = f.var[0] if f.var else None
+	return [(SFFPoly.from_dense(g, var, f.dom), m) for g, m in _list]
 
 def sffsff_list(f):
-	if not f.is_uni:
-		raise TypeError("cannot sffsff multivariate polynomial")
-	if f == sffpoly(0, f.dom):
-		return f
-	_lc = lc(f) ** (f.dom.mod - 2) % f.dom.mod
-	f *= _lc
-	fact = sffpoly(1, f.dom)
-	fact_list = []
-	flat = f // sffgcd(f, f.diff())
-	m = 0
-	while not flat.is_const:
-		while f % flat == 0:
-			f = f // flat
-			m += 1
-		_flat = sffgcd(flat, f)
-		g = flat // _flat
-		flat = _flat
-		fact *= g ** m
-		fact_list.append((g, m))
-	if not f.is_const:
-		p = f.dom.mod
-		colist = f.as_poly().as_list()
-		newcolist = []
-		for i in len(colist) / p:
-			newcolist.append(colist[i * p])
-		newsffpoly = sffpoly(Poly.from_list(newcolist, gens=f.var[0], domain=f.dom.as_sympy_FF()), f.dom)
-		_fact_list = sffsff_list(newsffpoly)[1]
-		_list = []
-		for t in _fact_list:
-			_list.append((t[0], t[1] * f.dom.mod))
-		fact_list.extend(_list)
-	return (_lc, fact_list)
+	"""
+	square-free decomposition of an univariate sffpoly
+	returns (lc, [(g, m)]) with monic square-free and pairwise coprime g
+	"""
+	_check_uni(f, "sffsff")
+	_lc, _f = dup_monic(f.to_dense(), f.dom)
+	return (sffconst(SFFElement.from_vec(_lc, f.dom), f.dom), _from_dense_list(f, dup_sqf_list(_f, f.dom)))
 
 def sfffactor_list(f):
-	_sffsff_list = sffsff_list(f)
-	_list = []
+	"""
+	factorization of an univariate sffpoly over its domain
+	by square-free, distinct-degree and equal-degree (Cantor-Zassenhaus) factorization
+	returns (lc, [(g, m)]) with monic irreducible g
+	"""
+	_check_uni(f, "factor")
+	_lc, _list = dup_factor_list(f.to_dense(), f.dom)
+	return (sffconst(SFFElement.from_vec(_lc, f.dom), f.dom), _from_dense_list(f, _list))
 
-def sfffactor_list_berlekamp(f):
-	if not isinstance(f, SFFPoly):
-		raise TypeError("needed a SFFPoly object, not %s" % f.__class__.__name__)
-	
 def sfffactor_equal_degree(f, d):
-	if not isinstance(f, SFFPoly):
-		raise TypeError("needed a SFFPoly object, not %s" % f.__class__.__name__)
-	r = f.degree() // d
-	q = f.dom.num
-	F = [f]
-	var = f.var[0]
-	while len(F) < r:
-		g = SFFQuotientPoly.random_poly(var, f.dom, r * d, f.rep)
-		g = sffpoly((g ** ((q ** d - 1) // 2) - 1).rep, f.dom)
-		F_1 = []
-		while len(F) > 0:
-			h = F.pop(-1)
-			z = sffgcd(h, g)
-			if z == 1 or z == h:
-				F_1.append(h)
-			else:
-				F_1.append(z)
-				F_1.append(h // z)
-		F = F_1
-	return F
\ No newline at end of file
+	"""
+	irreducible factors of a monic square-free sffpoly f
+	whose irreducible factors all have degree d
+	"""
+	_check_uni(f, "factor")
+	_dense = dup_strip(f.to_dense())
+	return [SFFPoly.from_dense(g, f.var[0], f.dom) for g in dup_edf(_dense, d, f.dom)]
+
+def sffresultant(f, g, var):
+	"""
+	resultant of sffpolys in at most two variables with respect to var
+	as a sffpoly in the other variable.
+	The univariate resultants at enough points of the other variable are
+	computed by Euclid's algorithm on the shared pool and interpolated.
+	When the domain has too few points they are taken in an extension of it.
+	"""
+	if not isinstance(f, SFFPoly) or not isinstance(g, SFFPoly):
+		raise TypeError("needed SFFPoly objects, not %s and %s" % (f.__class__.__name__, g.__class__.__name__))
+	if not f.dom == g.dom:
+		raise ValueError("argument sffpolys have different domains")
+	dom = f.dom
+	var = Symbol(var) if isinstance(var, str) else var
+	_other = [v for v in f.var + g.var if not v == var]
+	if any(not v == _other[0] for v in _other):
+		raise TypeError("cannot take resultant of polynomials in more than two variables")
+	t = _other[0] if _other else None
+	if not f.terms or not g.terms:
+		return SFFPoly.from_dense([], t, dom)
+	_f, _g = _coeff_list(f, var, t), _coeff_list(g, var, t)
+	m, n = len(_f) - 1, len(_g) - 1
+	_bound = n * max(len(c) - 1 for c in _f) + m * max(len(c) - 1 for c in _g)
+	_need = _bound + len(_f[-1]) + len(_g[-1]) - 1
+	edom = dom if dom.num >= _need else _resultant_extension(dom, _need)
+	if not edom == dom:
+		_pad = (0,) * (edom.dim - dom.dim)
+		_f = [[c + _pad for c in _c] for _c in _f]
+		_g = [[c + _pad for c in _c] for _c in _g]
+	_points = []
+	for i in range(edom.num):
+		t0 = edom._index_to_vec(i)
+		if any(dup_eval(_f[-1], t0, edom)) and any(dup_eval(_g[-1], t0, edom)):
+			_points.append(t0)
+			if len(_points) > _bound:
+				break
+	_values = pool_starmap(_resultant_at, [(_f, _g, t0, edom) for t0 in _points], len(_points) * (m + 1) * (n + 1))
+	_res = dup_interpolate(_points, _values, edom)
+	return SFFPoly.from_dense([c[:dom.dim] for c in _res], t, dom)
+
+def _coeff_list(f, var, t):
+	""" coefficients of f in var from degree 0 as dense polynomials in t """
+	i = f.var.index(var) if var in f.var else None
+	j = f.var.index(t) if t in f.var else None
+	_list = [[] for _ in range(f.degree(var) + 1)]
+	for e, c in f.terms.items():
+		_c = _list[e[i] if i is not None else 0]
+		k = e[j] if j is not None else 0
+		_c.extend([f.dom.zero] * (k + 1 - len(_c)))
+		_c[k] = c
+	return _list
+
+def _resultant_at(f, g, t0, dom):
+	return dup_resultant([dup_eval(c, t0, dom) for c in f], [dup_eval(c, t0, dom) for c in g], dom)
+
+_extensions = LRUCache(DOMAIN_CACHE_SIZE)
+
+def _resultant_extension(dom, num):
+	"""
+	extension of dom with at least num elements by an irreducible polynomial
+	over the prime field whose degree is coprime to the extension degree of dom
+	"""
+	k = 2
+	while dom.num ** k < num or not gcd(k, dom.exdeg) == 1:
+		k += 1
+	_ext = _extensions.get((dom, k))
+	if _ext is None:
+		_prime = sff(0, dom.mod)
+		while True:
+			_rel = dup_random(k, _prime)
+			_rel = _rel + [_prime.zero] * (k - len(_rel)) + [_prime.one]
+			_, _list = dup_factor_list(_rel, _prime)
+			if len(_list) == 1 and _list[0][1] == 1:
+				break
+		_ext = dom.extend(SFFPoly.from_dense(_rel, Dummy('t'), _prime).rep)
+		_extensions.put((dom, k), _ext)
+	return _ext
@@ -1,17 +1,19 @@
-from itertools import product
-from multiprocessing import Pool, Queue, Manager
-from queue import Empty
-import os
-
 from sympy.core.numbers import Integer
 from sympy.core.expr import Expr
-from sympy.core.function import diff, expand
-from sympy.core.symbol import symbols
-from sympy.ntheory.primetest import isprime
-from sympy.polys.polytools import factor_list, LC, LT, Poly, poly, resultant
+from sympy.core.function import expand
+try:
+    from sympy.core.sorting import default_sort_key
+except ImportError:
+    from sympy.core.compatibility import default_sort_key
+from sympy.core.symbol import Symbol
+from sympy.polys.polytools import LC, Poly, poly
 
 from sffdomains import sff, SFF
-from multiprocessingtools import SFFPool, StopEval
+from sffelements import SFFElement
+from sffdensetools import KRONECKER_THRESHOLD, dup_barrett, dup_divmod, dup_has_roots, dup_mul, dup_rem_barrett, dup_roots
+from sffevaltools import CHUNK_SIZE, np, zero_mask, SFFEvaluator
+from multiprocessingtools import pool_starmap, pool_stream, use_pool
+from profiletools import counted
 
 class SFFPoly:
     """ 
@@ -34,25 +36,43 @@ class SFFPoly:
     def __init__(self, rep, dom):
         """
             Instance variables:
-            * rep: expression of the polynomial
+            * terms: dict {exponent tuple of var: element vector of dom}
+                     which holds nonzero coefficients only
             * dom: domain field which is a SFF instance
             * var: list of variables of rep
                    if rep is an integer then var == []
             * is_uni: boolean value indicating if rep is univariate or not 
             * is_int: boolean value indicating if rep is an integer or not
 
+            The sympy expression 'rep' is built from terms only when it is asked.
         """
-        
-        if isinstance(rep, Integer) or isinstance(rep, int):
-            self.rep = rep
-            self.var = []
-            self.is_int = True
+        if isinstance(rep, SFFPoly):
+            if not rep.dom == dom:
+                raise ValueError("cannot convert a sffpoly over another domain")
+            self._set_terms(rep.var, rep.terms, dom)
+        elif isinstance(rep, Integer) or isinstance(rep, int) or isinstance(rep, SFFElement):
+            self._set_terms([], {(): dom.convert(rep)}, dom)
         else:
-            self.rep = reduce(rep.as_expr(), dom)
-            self.var = [v for v in poly(self.rep).gens if not v in dom.var_list] 
-            self.is_int = False
-
+            rep = rep.as_expr()
+            var = sorted((v for v in rep.free_symbols if not v in dom.var_list), key=default_sort_key)
+            if len(var) == 0:
+                self._set_terms([], {(): dom.from_sympy(rep)}, dom)
+            else:
+                terms = {}
+                for monom, coeff in Poly(rep, *var).terms():
+                    terms[monom] = dom.from_sympy(coeff)
+                self._set_terms(var, terms, dom)
+
+    def _set_terms(self, var, terms, dom):
+        terms = dict((e, c) for e, c in terms.items() if any(c))
+        used = [i for i in range(len(var)) if any(e[i] for e in terms)]
+        if len(used) < len(var):
+            var = [var[i] for i in used]
+            terms = dict((tuple(e[i] for i in used), c) for e, c in terms.items())
+        self.var = list(var)
+        self.terms = terms
         self.dom = dom
+        self._rep = None
         if len(self.var) == 0:
             self.is_const = True
             self.is_uni = False
@@ -63,9 +83,55 @@ class SFFPoly:
             self.is_const = False
             self.is_uni = False
 
+    def _new(f, var, terms):
+        """ sffpoly over f.dom built from native terms """
+        obj = SFFPoly.__new__(SFFPoly)
+        obj._set_terms(var, terms, f.dom)
+        return obj
+
+    @property
+    def rep(self):
+        if self._rep is None:
+            _rep = Integer(0)
+            for e, c in self.terms.items():
+                _term = self.dom.to_sympy(c)
+                for v, k in zip(self.var, e):
+                    _term *= v ** k
+                _rep += _term
+            self._rep = _rep
+        return self._rep
+
+    @property
+    def is_int(self):
+        return self.is_const and self.dom.is_int_vec(self.terms.get((), self.dom.zero))
+
+    def __getstate__(self):
+        return {'var': self.var, 'terms': self.terms, 'dom': self.dom}
+
+    def __setstate__(self, state):
+        self._set_terms(state['var'], state['terms'], state['dom'])
+
     def __repr__(self):
         return "%s(%s, %s)" % (self.__class__.__name__, self.rep, self.dom.as_SFF())
 
+    def _unify(f, g):
+        """ returns common variables and terms of f and g over them """
+        if f.var == g.var:
+            return f.var, f.terms, g.terms
+        var = sorted(set(f.var) | set(g.var), key=default_sort_key)
+        return var, _lift_terms(f.terms, f.var, var), _lift_terms(g.terms, g.var, var)
+
+    def _coerce(f, g):
+        if isinstance(g, SFFPoly):
+            if not f.dom == g.dom:
+                raise ValueError("argument sffpolys have different domains")
+            return g
+        if isinstance(g, int) or isinstance(g, Integer) or isinstance(g, SFFElement):
+            return f._new([], {(): f.dom.convert(g)})
+        if isinstance(g, Expr):
+            return sffpoly(g, f.dom)
+        return None
+
     def __add__(f,g):
         """
         Add two polynomials ``f`` and ``g``
@@ -78,16 +144,14 @@ class SFFPoly:
         >>> f + g
         Ssffpoly(2 * x, x, modulus=5)
         """
-        if not isinstance(g, SFFPoly):
-            if isinstance(g, int) or isinstance(g, Integer):
-                return sffpoly(reduce(f.rep + g, f.dom), f.dom)
-            else:
-                raise TypeError("cannot add %s and %s" % (f.__class__.__name__, g.__class__.__name__))
-        if f.dom == g.dom:
-            _add = reduce(f.rep + g.rep, f.dom)
-            return sffpoly(_add, f.dom)
-        else:
-            raise ValueError("argument sffpolys have different domains")
+        _g = f._coerce(g)
+        if _g is None:
+            raise TypeError("cannot add %s and %s" % (f.__class__.__name__, g.__class__.__name__))
+        var, s, t = f._unify(_g)
+        _add = dict(s)
+        for e, c in t.items():
+            _add[e] = f.dom.add(_add[e], c) if e in _add else c
+        return f._new(var, _add)
 
     def __sub__(f,g):
         """
@@ -101,16 +165,17 @@ class SFFPoly:
         >>> f - g
         Ssffpoly(x, x, a, modulus=5)
         """
-        if not isinstance(f, SFFPoly) or not isinstance(g, SFFPoly):
-            if isinstance(g, int) or isinstance(g, Integer):
-                return sffpoly(reduce(f.rep - g, f.dom), f.dom)
-            else:
-                raise TypeError("cannot add %s and %s" % (f.__class__.__name__, g.__class__.__name__))
-        if f.dom == g.dom:
-            _sub = reduce(f.rep - g.rep, f.dom)
-            return sffpoly(_sub, f.dom)
-        else:
-            raise ValueError("argument sffpolys have different domains")
+        _g = f._coerce(g)
+        if _g is None:
+            raise TypeError("cannot subtract %s and %s" % (f.__class__.__name__, g.__class__.__name__))
+        var, s, t = f._unify(_g)
+        _sub = dict(s)
+        for e, c in t.items():
+            _sub[e] = f.dom.sub(_sub[e], c) if e in _sub else f.dom.neg(c)
+        return f._new(var, _sub)
+
+    def __neg__(f):
+        return f._new(f.var, dict((e, f.dom.neg(c)) for e, c in f.terms.items()))
 
     def __mul__(f,g):
         """
@@ -125,78 +190,84 @@ class SFFPoly:
         Ssffpoly(x ** 2 + 2 * a * x * y - y ** 2, x, modulus=5)
         """
         if isinstance(g, int) or isinstance(g, Integer):
-        	return sffpoly(f.rep * g, f.dom)
-        if isinstance(g, SFFPoly):
-	        if f.dom == g.dom:
-	            _mul = reduce(f.rep * g.rep, f.dom)
-	            return sffpoly(_mul, f.dom)
-	        else:
-	            raise ValueError("argument sffpolys have different domains")
-        else:
-        	raise TypeError("cannot multiple %s and %s" % (f.__class__.__name__, g.__class__.__name__))
+            return f._new(f.var, dict((e, f.dom.mul_int(c, int(g))) for e, c in f.terms.items()))
+        _g = f._coerce(g)
+        if _g is None:
+            raise TypeError("cannot multiple %s and %s" % (f.__class__.__name__, g.__class__.__name__))
+        var, s, t = f._unify(_g)
+        if len(var) == 1 and min(len(s), len(t)) >= KRONECKER_THRESHOLD and _is_dense(s) and _is_dense(t):
+            return f.from_dense(dup_mul(_dense_terms(s, f.dom), _dense_terms(t, f.dom), f.dom), var[0], f.dom)
+        return f._new(var, _mul_terms(s, t, f.dom))
 
     def __truediv__(f, g):
         raise TypeError("cannot divide f by g")
 
     def __floordiv__(f, g):
-    	if f.is_const:
-    		return g * f ** (f.dom.num - 2)
-    	if g.is_const:
-    		return f * g ** (f.dom.num - 2)
-    	if not f.is_uni or not g.is_uni:
-    		raise TypeError("cannot divide multivariate polynomial(s)")
-    	if not f.var[0] == g.var[0]:
-    		raise ValueError("cannot divide polynomials which have different variables")
-    	if f.degree() < g.degree():
-    		return sffgen(0, f.dom)
-    	_var = f.var[0]
-    	_div = sffpoly(0, f.dom)
-    	while f.degree() >= g.degree():
-    		lt_f = sffconst(lc(f, _var), f.dom)
-    		lt_g = sffconst(lc(g, _var), f.dom)
-    		_term = (lt_f / lt_g).rep * _var ** (f.degree() - g.degree())
-    		_div += sffpoly(_term, f.dom)
-    		_mul = reduce(_term * g.rep, f.dom)
-    		f -= sffpoly(_mul, f.dom)
-    		if f == 0:
-    			break
-    	return _div
+        return f._divmod(g)[0]
 
     def __mod__(f, g):
-    	return f - (f // g) * g
+        return f._divmod(g)[1]
 
+    def _divmod(f, g):
+        if not isinstance(g, SFFPoly):
+            g = f._coerce(g)
+        if g.is_const:
+            if g.terms == {}:
+                raise ZeroDivisionError("polynomial division by zero")
+            _inv = f.dom.inv(g.terms[()])
+            return f._new(f.var, dict((e, f.dom.mul(c, _inv)) for e, c in f.terms.items())), f._new([], {})
+        if f.is_const:
+            return f._new([], {}), f
+        if not f.is_uni or not g.is_uni:
+            raise TypeError("cannot divide multivariate polynomial(s)")
+        if not f.var[0] == g.var[0]:
+            raise ValueError("cannot divide polynomials which have different variables")
+        _div, _rem = dup_divmod(f.to_dense(), g.to_dense(), f.dom)
+        return f.from_dense(_div, f.var[0], f.dom), f.from_dense(_rem, f.var[0], f.dom)
+
+    @counted('SFFPoly.__pow__')
     def __pow__(f, e):
+        return f._pow(e)
+
+    def _pow(f, e):
+        """ f ** e without the counter, for subclasses counted on their own """
         if not isinstance(e, int) and not isinstance(e, Integer):
             raise TypeError("second argument needs to be an integer, not %s" % e.__class__.__name__)
-        if f.is_int:
-            return sffpoly(f.rep ** e, f.dom)
+        e = int(e)
+        if f.is_const:
+            if e < 0:
+                e = f.dom.num + e - 1
+            return f._new([], {(): f.dom.pow(f.terms.get((), f.dom.zero), e)})
         if e < 0:
             e = f.dom.num + e - 1
         if e == 0:
             return sffpoly(1, f.dom)
         if e == 1:
             return f
+        _size = len(f.terms) ** 2 * e.bit_length()
+        if not use_pool(_size):
+            return _pow_binary(f, e)
         num_ = bin(e).replace('0b','')
         len_ = len(num_)
         list_ = [(f, len_ - d - 1) for d in range(len_) if num_[d] == '1']
-        with Pool(os.cpu_count()) as p:
-            result = p.starmap(_pow_self, list_)
-        pow_ = 1
+        result = pool_starmap(_pow_self, list_, _size)
+        pow_ = sffpoly(1, f.dom)
         for r in result:
-            pow_ = reduce(pow_ * r, f.dom)
-        return sffpoly(pow_, f.dom)
+            pow_ = pow_ * f._new(f.var, r)
+        return pow_
 
     def __eq__(f,g):
         if isinstance(g, SFFPoly):
-            if f.rep == g.rep:
-                return True
-            else:
-                return False
-        else:
-            if f.rep == g:
-                return True
-            else:
+            if f.dom == g.dom:
+                return f.var == g.var and f.terms == g.terms
+            return f.rep == g.rep
+        if isinstance(g, int) or isinstance(g, Integer) or isinstance(g, SFFElement) or isinstance(g, Expr):
+            try:
+                g = sffpoly(g, f.dom)
+            except ValueError:
                 return False
+            return f.var == g.var and f.terms == g.terms
+        return False
 
     def as_expr(self):
         return self.rep
@@ -207,15 +278,35 @@ class SFFPoly:
         else:
             return poly(self.rep, domain=self.dom.as_sympy_FF())
 
+    def to_dense(self):
+        """ list of coefficient vectors of a univariate polynomial from degree 0 """
+        if self.is_const:
+            return [self.terms[()]] if self.terms else []
+        if not self.is_uni:
+            raise TypeError("cannot convert multivariate polynomial to dense list")
+        _dense = [self.dom.zero] * (self.degree() + 1)
+        for e, c in self.terms.items():
+            _dense[e[0]] = c
+        return _dense
+
+    @staticmethod
+    def from_dense(dense, var, dom):
+        obj = SFFPoly.__new__(SFFPoly)
+        obj._set_terms([var], dict(((i,), c) for i, c in enumerate(dense)), dom)
+        return obj
+
     def degree(self, *gens):
-        if self.rep == 0:
+        if self.terms == {}:
             return "-oo"
-        elif self.is_int:
+        elif self.is_const:
             return 0
         elif len(gens) == 0:
-            return poly(self.rep).degree()
+            return max(e[0] for e in self.terms)
         elif len(gens) == 1:
-            return poly(self.rep).degree(gens[0])
+            if not gens[0] in self.var:
+                return 0
+            i = self.var.index(gens[0])
+            return max(e[i] for e in self.terms)
         else:
             raise ValueError("need only one or zero argument")
 
@@ -230,60 +321,144 @@ class SFFPoly:
             raise TypeError("this is a modular integer")
         if point == {}:
             raise ValueError
-        _rep = self.rep
+        return self._subs(point).rep
+
+    def _subs(self, point):
+        dom = self.dom
+        values = {}
         for k, v in point.items():
-            _rep = expand(_rep.subs({k: v}))
-        return reduce(_rep, self.dom)
+            if isinstance(k, str):
+                k = Symbol(k)
+            if k in self.var:
+                if isinstance(v, SFFPoly):
+                    if not v.is_const:
+                        raise TypeError("cannot substitute a non constant sffpoly")
+                    v = v.terms.get((), dom.zero)
+                values[self.var.index(k)] = dom.convert(v)
+        keep = [i for i in range(len(self.var)) if not i in values]
+        powers = dict((i, [dom.one]) for i in values)
+        _subs = {}
+        for e, c in self.terms.items():
+            for i in values:
+                _pow = powers[i]
+                while len(_pow) <= e[i]:
+                    _pow.append(dom.mul(_pow[-1], values[i]))
+                c = dom.mul(c, _pow[e[i]])
+            e_ = tuple(e[i] for i in keep)
+            _subs[e_] = dom.add(_subs[e_], c) if e_ in _subs else c
+        return self._new([self.var[i] for i in keep], _subs)
 
     def subs_as_sffpoly(self, **args):
-        return sffpoly(self.subs(args), self.dom)
+        return self._subs(args)
         
     def solve_abs(self):
         """ solve self over its algebraic closure """
         raise NotImplementedError
 
-    def solve(self):
-        # _sol = []
-        # for point in self.dom.points_as_dict_iter(self.var):
-        #     if self.subs(point) == 0:
-        #         _sol.append(point)
-        # return _sol
+    def roots(self):
+        """
+        roots of an univariate sffpoly in its domain with multiplicities
+        as [(SFFElement, m)], found by splitting gcd(f, x ** q - x)
+        """
+        if self.terms == {}:
+            raise ValueError("zero polynomial has every element as root")
+        if self.is_const:
+            return []
+        if not self.is_uni:
+            raise TypeError("cannot find roots of multivariate polynomial")
+        return [(SFFElement.from_vec(r, self.dom), m) for r, m in dup_roots(self.to_dense(), self.dom)]
+
+    def has_roots(self):
+        if self.is_const:
+            return self.terms == {}
+        if not self.is_uni:
+            raise TypeError("cannot find roots of multivariate polynomial")
+        return dup_has_roots(self.to_dense(), self.dom)
+
+    def solve(self, bound=None, chunk=None):
+        """
+        points of the domain where self vanishes.
+        The points are split into contiguous chunks of indices (see SFF.point_vec)
+        searched by the shared pool; when bound is given the search stops
+        as soon as that many points are found.
+        """
+        if self.is_uni:
+            return [{self.var[0]: r.as_expr()} for r, m in self.roots()]
         _sol = []
-        m = Manager()
-        q = m.Queue()
-        with Pool(os.cpu_count()) as p:
-        	p.starmap_async(_eval_solve, self.dom.points_as_dict_with_poly_and_queue_iter(self.var, self, q))
-        	if q.qsize == self.degree():
-        		p.terminate()
-        while not q.empty():
-        	_sol.append(q.get())
-        return _sol
+        for _index in self._solve_chunks(bound, chunk):
+            _sol.extend(_index)
+            if bound is not None and len(_sol) >= bound:
+                break
+        _sol.sort(key=self.dom.point_index)
+        return [self._point_as_dict(point) for point in _sol[:bound]]
+
+    def iter_solutions(self, chunk=None):
+        """
+        yields the points where self vanishes as soon as they are found.
+        Points come chunk by chunk in order of completion; when the
+        consumer stops iterating no further chunks are submitted.
+        """
+        if self.is_uni:
+            for r, m in self.roots():
+                yield {self.var[0]: r.as_expr()}
+            return
+        _chunks = self._solve_chunks(chunk=chunk)
+        try:
+            for _index in _chunks:
+                for point in _index:
+                    yield self._point_as_dict(point)
+        finally:
+            _chunks.close()
+
+    def _solve_chunks(self, bound=None, chunk=None):
+        """ yields lists of zeros as tuples of vectors, chunk by chunk in order of completion """
+        n = len(self.var)
+        _total = self.dom.num ** n
+        if chunk is None:
+            chunk = CHUNK_SIZE if np is not None else 1024
+        _tasks = ((self, start, min(start + chunk, _total)) for start in range(0, _total, chunk))
+        return pool_stream(_solve_chunk, _tasks, _total * len(self.terms))
+
+    def _point_as_dict(self, point):
+        return dict((v, self.dom.to_sympy(c)) for v, c in zip(self.var, point))
 
     def is_primitive():
         raise TypeError("This is SFFPoly object.")
 
-    def is_const(self):
-        return self.is_const
-
-    def diff(self, var):
-        return sffpoly(reduce(diff(self.rep, var), self.dom), self.dom)
-
     def sing(self):
         """ find singular locus of self """
         pass
 
     def reduce(self):
-        self.rep = reduce(self.rep, self.dom)
+        """ terms are always reduced, kept for compatibility """
+        pass
 
     def diff(self, *gens):
-    	if len(gens) == 0:
-    		return sffpoly(diff(self.rep, self.var[0]), self.dom)
-    	else:
-    		return sffpoly(diff(self.rep, gens[0]), self.dom)
+        var = self.var[0] if len(gens) == 0 else gens[0]
+        if not var in self.var:
+            return self._new([], {})
+        i = self.var.index(var)
+        _diff = {}
+        for e, c in self.terms.items():
+            if e[i] % self.dom.mod:
+                _diff[e[:i] + (e[i] - 1,) + e[i + 1:]] = self.dom.mul_int(c, e[i])
+        return self._new(self.var, _diff)
+
+    def compile(self, *gens):
+        """
+        SFFEvaluator of self and its partial derivatives at points over gens,
+        which default to the variables of self
+        """
+        if len(gens) == 0:
+            return SFFEvaluator(self.var, self.terms, self.dom)
+        gens = [Symbol(v) if isinstance(v, str) else v for v in gens]
+        if any(not v in gens for v in self.var):
+            raise ValueError("gens need to contain the variables %s" % self.var)
+        return SFFEvaluator(gens, _lift_terms(self.terms, self.var, gens), self.dom)
 
     def toSFFConst(self):
     	if self.is_const:
-    		return sffconst(self.rep, self.dom)
+    		return sffconst(self, self.dom)
     	else:
     		raise TypeError("cannot convert not constant elements to SFFConst")
 
@@ -301,8 +476,8 @@ class SFFQuotientPoly(SFFPoly):
     def __init__(self, rel, dom, quo): 
         super().__init__(rel, dom)
         mod = dom.mod
-        if quo == 0:
-            pass
+        if quo == 0 or quo == []:
+            self.quo_list = []
         else:
             self.quo_list = []
             if isinstance(quo, Expr):
@@ -335,17 +510,29 @@ class SFFQuotientPoly(SFFPoly):
                                                   'deg': poly(_p).degree()})
             else:
                 raise ValueError("the third argument needs to be 0, an Expr instance or list.")
+        self._quo_polys = [_quo_reducer(q['rep'], dom) for q in self.quo_list]
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['quo_list'] = self.quo_list
+        state['_quo_polys'] = self._quo_polys
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.quo_list = state['quo_list']
+        self._quo_polys = state['_quo_polys']
 
     def __repr__(self):
         return "%s(%s, %s, over %s)" % (self.__class__.__name__, self.rep, self.dom.as_SFF(), self.quos())
 
     def __add__(f, g):
         add = super().__add__(g)
-        return sffquotientpoly(add.as_expr(), f.dom, f.quo_list)
+        return sffquotientpoly(add, f.dom, f.quo_list)
 
     def __sub__(f, g):
         sub = super().__sub__(g)
-        return sffquotientpoly(sub.as_expr(), f.dom, f.quo_list)
+        return sffquotientpoly(sub, f.dom, f.quo_list)
 
     def __mul__(f, g):
         """
@@ -359,98 +546,77 @@ class SFFQuotientPoly(SFFPoly):
         >>> f * g
         Ssffpoly(x ** 2 + 2 * a * x * y - y ** 2, x, modulus=5)
         """
-        if isinstance(g, int) or isinstance(g, Integer):
-            return sffpoly(f.rep * g, f.dom)
-        elif isinstance(g, SFFQuatientPoly):
-            if f.dom == g.dom:
-                _mul = reduce(f.rep * g.rep, f.dom)
-                for q in f.quo_list:
-                    _mul = simple_reduce(_mul, q)
-                return sffpoly(_mul, f.dom)
-            else:
-                raise ValueError("argument sffpolys have different domains")
-        elif isinstance(g, SFFPoly):
-            if f.dom == g.dom:
-                _mul = reduce(f.rep * g.rep, f.dom)
-                return sffpoly(_mul, f.dom)
+        _mul = super().__mul__(g)
+        return sffquotientpoly(f._quo_reduce(_mul), f.dom, f.quo_list)
+
+    def _quo_reduce(f, g):
+        """
+        g modulo the quotients, by Barrett reduction of the slices of g along
+        the variable of a univariate quotient
+        """
+        for _quo, (q, _dense, h) in zip(f.quo_list, f._quo_polys):
+            if not q.var[0] in g.var:
+                continue
+            if _dense is None:
+                g = sffpoly(simple_reduce(g.rep, _quo, g.dom.reduce_cache), g.dom)
             else:
-                raise ValueError("argument sffpolys have different domains")
-        else:
-            raise TypeError("cannot multiple %s and %s" % (f.__class__.__name__, g.__class__.__name__))
+                g = g._new(g.var, _rem_slices(g.terms, g.var.index(q.var[0]), _dense, h, g.dom))
+        return g
 
+    @counted('SFFQuotientPoly.__pow__')
     def __pow__(f, e):
         if not isinstance(e, int) and not isinstance(e, Integer):
             raise TypeError("second argument needs to be an integer, not %s" % e.__class__.__name__)
-        if f.is_int:
-            return sffquotientpoly(f.rep ** e, f.dom, f.quo_list)
+        e = int(e)
+        if f.is_const:
+            return sffquotientpoly(SFFPoly._pow(f, e), f.dom, f.quo_list)
         if e < 0:
             e = f.dom.num + e - 1
         if e == 0:
             return sffquotientpoly(1, f.dom, f.quo_list)
         if e == 1:
             return f
+        _size = len(f.terms) ** 2 * e.bit_length()
+        if not use_pool(_size):
+            return _pow_binary(f, e)
         num_ = bin(e).replace('0b','')
         len_ = len(num_)
         list_ = [(f, len_ - d - 1) for d in range(len_) if num_[d] == '1']
-        with Pool(os.cpu_count()) as p:
-            result = p.starmap(_pow_self_quo, list_)
-        pow_ = 1
+        result = pool_starmap(_pow_self_quo, list_, _size)
+        pow_ = sffpoly(1, f.dom)
         for r in result:
-            pow_ = reduce(pow_ * r, f.dom)
-            for q in f.quo_list:
-                pow_ = simple_reduce(pow_, q)
-        return sffquotientpoly(reduce(pow_, f.dom), f.dom, f.quo_list)
+            pow_ = f._quo_reduce(pow_ * f._new(f.var, r))
+        return sffquotientpoly(pow_, f.dom, f.quo_list)
 
     def quos(self):
         return [q['rep'] for q in self.quo_list]
 
 class SFFConst(SFFPoly):
     def __truediv__(f,g):
-        return f * g ** (f.dom.num - 2)
+        _g = f._coerce(g)
+        if _g is None or not _g.is_const:
+            raise TypeError("cannot divide %s by %s" % (f.__class__.__name__, g.__class__.__name__))
+        return f._new([], {(): f.dom.mul(f.terms.get((), f.dom.zero), f.dom.inv(_g.terms.get((), f.dom.zero)))})
 
-    def is_primitive(self):
-        num_ = (self.dom.num - 1) // 2
-        if not self ** num_ == -1:
-            return False
-        with SFFPool(os.cpu_count()) as p:
-            try:
-                p.starmap_async(_is_primitive, self.iter_with_factor_count(num_)).get()
-            except StopEval:
-                p.close()
-                return False
-        return True
+    def inverse(self):
+        return sffconst(SFFElement.from_vec(self.dom.inv(self.terms.get((), self.dom.zero)), self.dom), self.dom)
 
-    def iter_with_count(self, m):
-        for i in range(m):
-            yield (self, i)
-
-    def iter_with_factor_count(self, m):
-        for i in range(1, m):
-            if m % i == 0:
-                yield (self, i)
-            else:
-                continue
+    def is_primitive(self):
+        return self.dom.is_primitive_vec(self.terms.get((), self.dom.zero))
 
     def minpoly(self, var):
         p = sffpoly(1, self.dom)
         var = sffpoly(var, self.dom)
+        conj = self.terms.get((), self.dom.zero)
         for i in range(self.dom.exdeg):
-            p *= (var - self ** (self.dom.mod ** i))
-        return reduce(p.rep, self.dom)
+            p *= (var - sffconst(SFFElement.from_vec(conj, self.dom), self.dom))
+            conj = self.dom.frobenius(conj)
+        return p.rep
 
     def toSFFConst(self):
     	raise TypeError("this is already SFFConst")
 
 class SFFInt(SFFConst):
-    def is_primitive(self):
-        if self.dom.is_prime:
-            if not self.rep == 0 and not self.rep == 1:
-                return True
-            else:
-                return False
-        else:
-            return False
-
     def toSFFConst(self):
     	raise TypeError("this is already SFFConst")
 
@@ -458,8 +624,8 @@ def sffgen(rep, dom, quo=0):
     if quo == 0:
         if isinstance(rep, int) or isinstance(rep, Integer):
             return sffint(rep, dom)
-        elif isintance(rep, Expr):
-            var = [v for v in rep.as_poly().gens if not v in dom.var_list]
+        elif isinstance(rep, Expr):
+            var = [v for v in rep.free_symbols if not v in dom.var_list]
             if len(var) == 0:
                 return sffconst(rep, dom)
             else:
@@ -480,10 +646,55 @@ def sffint(rep, dom):
 def sffquotientpoly(rep, dom, quo):
     return SFFQuotientPoly(rep, dom, quo)
 
+def _lift_terms(terms, var, new_var):
+    """ rewrite exponent tuples over var into ones over new_var """
+    index = [new_var.index(v) for v in var]
+    n = len(new_var)
+    lifted = {}
+    for e, c in terms.items():
+        e_ = [0] * n
+        for i, k in zip(index, e):
+            e_[i] = k
+        lifted[tuple(e_)] = c
+    return lifted
+
+def _is_dense(terms):
+    """ whether univariate terms fill at least half of the degrees up to the leading one """
+    return 2 * len(terms) > max(e[0] for e in terms) + 1
+
+def _dense_terms(terms, dom):
+    """ dense list of univariate terms """
+    _dense = [dom.zero] * (max(e[0] for e in terms) + 1)
+    for e, c in terms.items():
+        _dense[e[0]] = c
+    return _dense
+
+def _mul_terms(s, t, dom):
+    _mul = {}
+    for e, c in s.items():
+        for e_, c_ in t.items():
+            k = tuple(a + b for a, b in zip(e, e_))
+            m = dom.mul(c, c_)
+            _mul[k] = dom.add(_mul[k], m) if k in _mul else m
+    return _mul
+
+@counted('reduce')
 def reduce(f, dom):
+	"""
+	reduce f by the relations of dom,
+	results are memoized in dom.reduce_cache
+	"""
 	if not isinstance(f, Expr):
 		raise TypeError("reduce() argument must be an integer or an Expr object, not %s" % f.__class__.__name__)
-	elif isinstance(f, Integer) or isinstance(f, int):
+	_key = ('reduce', f)
+	_reduced = dom.reduce_cache.get(_key)
+	if _reduced is None:
+		_reduced = _reduce(f, dom)
+		dom.reduce_cache.put(_key, _reduced)
+	return _reduced
+
+def _reduce(f, dom):
+	if isinstance(f, Integer) or isinstance(f, int):
 		f %= dom.mod
 		if f > dom.mod // 2:
 			return f - dom.mod
@@ -495,7 +706,7 @@ def reduce(f, dom):
 		for rel in dom.rel_list:
 			if rel['rep'] == 0 or not rel['var'] in var:
 				continue
-			f = simple_reduce(f, rel)
+			f = simple_reduce(f, rel, dom.reduce_cache)
 		if isinstance(f, Integer) or isinstance(f, int):
 			f %= dom.mod
 			if f > dom.mod // 2:
@@ -505,14 +716,54 @@ def reduce(f, dom):
 		else:
 			return poly(f, domain=dom.as_sympy_FF()).as_expr()
 
-def simple_reduce(f, rel):
+@counted('simple_reduce')
+def simple_reduce(f, rel, cache=None):
+    """
+    reduce f by one relation,
+    results are memoized in cache (a LRUCache) if it is given
+    """
     if not isinstance(f, Expr):
         raise TypeError("reduce() argument must be an integer or Expr object, not %s" % f.__class__.__name__)
-    lm = rel['var'] ** rel['deg']
-    if poly(f).degree(rel['var']) < poly(rel['rep']).degree(rel['var']):
+    if cache is None:
+        return _simple_reduce_rel(f, rel)
+    _key = ('simple', rel['var'], rel['rep'], f)
+    _reduced = cache.get(_key)
+    if _reduced is None:
+        _reduced = _simple_reduce_rel(f, rel, cache)
+        cache.put(_key, _reduced)
+    return _reduced
+
+def _simple_reduce_rel(f, rel, cache=None):
+    """
+    f modulo rel by Barrett reduction: with h = 1 / rev(rel) the reversed
+    quotient is rev(f) * h truncated, so the remainder takes two multiplications
+    """
+    var = rel['var']
+    lm = var ** rel['deg']
+    _f = Poly(f, var)
+    _rel = Poly(rel['rep'], var)
+    m = _f.degree() - _rel.degree()
+    if m < 0:
         return expand(f)
-    else:
-        return _simple_reduce(f, lm, lm - rel['rep'], rel['var'])
+    if not _rel.LC() == 1:
+        return _simple_reduce(f, lm, lm - rel['rep'], var)
+    _top = _f.all_coeffs()[:m + 1]
+    h = _reciprocal(rel, _rel, m + 1, cache)
+    _quo = sum(expand(sum(_top[j] * h[i - j] for j in range(i + 1))) * var ** (m - i) for i in range(m + 1))
+    return expand(f - _quo * rel['rep'])
+
+def _reciprocal(rel, rel_poly, n, cache=None):
+    """ first n coefficients of 1 / rev(rel) for monic rel, memoized in cache """
+    _key = ('reciprocal', rel['var'], rel['rep'])
+    h = cache.get(_key) if cache is not None else None
+    if h is None or len(h) < n:
+        _rev = rel_poly.all_coeffs()
+        h = [Integer(1)]
+        for k in range(1, n):
+            h.append(expand(-sum(_rev[j] * h[k - j] for j in range(1, min(k, len(_rev) - 1) + 1))))
+        if cache is not None:
+            cache.put(_key, h)
+    return h
 
 def _simple_reduce(f, lm, sub, var):
     if poly(f).degree(var) == poly(lm).degree(var):
@@ -535,54 +786,77 @@ def ff_solve(polys):
                 _sol.remove(q)
     return _sol
 
-def _eval_solve(f, p, q):
-	if f.subs(p) == 0:
-		q.put(p)
+def _solve_chunk(f, start, stop):
+    """
+    zeros of f among the points start, ..., stop - 1,
+    numbered as in SFF.point_vec with numpy and in Gray order without
+    """
+    n = len(f.var)
+    if np is not None:
+        return [f.dom.point_vec(n, start + int(i)) for i in np.flatnonzero(zero_mask(f, start, stop))]
+    return [point for point in f.dom.gray_points_iter(n, start, stop) if f._subs(dict(zip(f.var, point))).terms == {}]
+
+def _quo_reducer(rep, dom):
+    """
+    (modulus as sffpoly, its dense list, reciprocal for dup_rem_barrett)
+    of a quotient, memoized in dom.reduce_cache
+    """
+    _key = ('quo', rep)
+    _reducer = dom.reduce_cache.get(_key)
+    if _reducer is None:
+        q = sffpoly(rep, dom)
+        _dense = q.to_dense() if q.is_uni else None
+        _reducer = (q, _dense, dup_barrett(_dense, dom) if _dense is not None else None)
+        dom.reduce_cache.put(_key, _reducer)
+    return _reducer
+
+def _rem_slices(terms, k, g, h, dom):
+    """ terms reduced modulo the dense g in the variable k, slice by slice """
+    _slices = {}
+    for e, c in terms.items():
+        _slices.setdefault(e[:k] + e[k + 1:], {})[e[k]] = c
+    _rem = {}
+    for r, line in _slices.items():
+        _line = [line.get(d, dom.zero) for d in range(max(line) + 1)]
+        for d, c in enumerate(dup_rem_barrett(_line, g, h, dom)):
+            if any(c):
+                _rem[r[:k] + (d,) + r[k:]] = c
+    return _rem
+
+def _pow_binary(f, e):
+    """ f ** e by repeated squaring in-process """
+    pow_, base_ = None, f
+    while e:
+        if e & 1:
+            pow_ = base_ if pow_ is None else pow_ * base_
+        e >>= 1
+        if e:
+            base_ = base_ * base_
+    return pow_
 
 def _pow_self(f, n):
-    """ f needs to be an sffpoly element"""
-    pow_ = f.rep
+    """ f needs to be an sffpoly element, returns terms of f ** (2 ** n) """
+    pow_ = sffpoly(f, f.dom)
     for i in range(n):
-        pow_ = reduce(pow_ * pow_, f.dom)
-    if isinstance(pow_, int) or isinstance(pow_, Integer):
-        return pow_
-    else:
-        return poly(pow_, domain=f.dom.as_sympy_FF()).as_expr()
+        pow_ = pow_ * pow_
+    return _lift_terms(pow_.terms, pow_.var, f.var)
 
 def _pow_self_quo(f, n):
-    """ f needs to be an sffpoly element"""
-    pow_ = f.rep
+    """ f needs to be an sffquotientpoly element, returns terms of f ** (2 ** n) """
+    pow_ = f
     for i in range(n):
-        pow_ = reduce(pow_ * pow_, f.dom)
-        for q in f.quo_list:
-            pow_ = simple_reduce(pow_, q)
-    if isinstance(pow_, int) or isinstance(pow_, Integer):
-        return pow_
-    else:
-        return poly(pow_, domain=f.dom.as_sympy_FF()).as_expr()
-
-def _is_primitive(f, i):
-    if f ** i == -1:
-        raise StopEval()
-    else:
-        pass
+        pow_ = pow_ * pow_
+    return _lift_terms(pow_.terms, pow_.var, f.var)
 
 def primitive_elements(dom):
-    result = []
-    for e in dom.elements_iter():
-        if sffconst(e, dom).is_primitive():
-            result.append(e)
-    return result
+    """ all primitive elements of dom as powers of one generator """
+    return [e.as_expr() for e in dom.primitive_elements_iter()]
 
 def primitive_element(dom):
-    for e in dom.elements_iter():
-        if sffconst(e, dom).is_primitive():
-            return sffconst(e, dom)
-    raise TypeError("this has no primitive element")
-
-def _primitive_eval(f, q):
-    if f.is_primitive():
-        q.put(f.rep)
+    try:
+        return sffconst(dom.primitive_element(), dom)
+    except ValueError:
+        raise TypeError("this has no primitive element")
 
 def simplify(ff, var):
     if not isinstance(ff, SFF):
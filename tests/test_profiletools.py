@@ -0,0 +1,60 @@
+"""
+    Spans and counters recorded by profiletools.
+"""
+import time
+
+from sympy.core.symbol import symbols
+from sympy.polys.polytools import poly
+
+from sffdomains import cached_sff
+from sffpolytools import sffpoly, sffquotientpoly
+from multiprocessingtools import close_pool, pool_settings, pool_stream
+from profiletools import counted, is_enabled, profile, span
+from resolution import sing
+
+x, y = symbols('x y')
+
+def test_disabled():
+    assert not is_enabled()
+    with profile() as stats:
+        assert is_enabled()
+    assert not is_enabled()
+    assert stats.calls == {}
+
+def test_span_counted():
+    @counted('double')
+    def double(n):
+        return 2 * n
+    with profile() as stats:
+        for n in range(3):
+            with span('loop'):
+                double(n)
+    assert stats.calls == {'loop': 3, 'double': 3}
+    assert stats.seconds['loop'] >= stats.seconds['double']
+
+def test_sing_spans():
+    with profile() as stats:
+        sing(poly(y ** 2 - x ** 3 - x ** 2, x, y, modulus=7))
+    assert stats.calls['sing'] == 1
+    for name in ['resultant', 'factor_list', 'root_finding', 'domain_construction', 'candidate_check']:
+        assert name in stats.calls
+
+def test_pow_counted_once():
+    dom = cached_sff(0, 7)
+    with profile() as stats:
+        sffquotientpoly(3, dom, x ** 2 - 3) ** 4
+        sffpoly(x + y, dom) ** 4
+    assert stats.calls == {'SFFQuotientPoly.__pow__': 1, 'SFFPoly.__pow__': 1}
+
+def test_pool_stream_span():
+    try:
+        with pool_settings(2, 0), profile() as stats:
+            _results = []
+            for r in pool_stream(pow, [(2, k, 101) for k in range(6)], 1):
+                time.sleep(0.2)
+                _results.append(r)
+    finally:
+        close_pool()
+    assert sorted(_results) == sorted(pow(2, k, 101) for k in range(6))
+    assert stats.calls['pool_stream'] == 7
+    assert stats.seconds['pool_stream'] < 0.6
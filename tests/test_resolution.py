@@ -0,0 +1,110 @@
+"""
+    Singular points of plane curves over FF(p) and their resolution.
+"""
+import random
+
+import pytest
+
+import multiprocessingtools
+from multiprocessingtools import close_pool
+
+from sympy.core.symbol import symbols
+from sympy.polys.polytools import poly
+
+from resolution import local_expansion, resolve, sing, sing_many, sing_sweep
+
+x, y = symbols('x y')
+
+def _random_curves(count, seed):
+    rng = random.Random(seed)
+    while count:
+        p = rng.choice([3, 5, 7])
+        e = sum(rng.randint(-2, 2) * x ** i * y ** j for i in range(5) for j in range(5) if i + j <= 4)
+        f = poly(e, x, y, modulus=p)
+        if f.is_zero or f.degree(x) < 1 or f.degree(y) < 1:
+            continue
+        yield f
+        count -= 1
+
+def test_sing_gcd_pairs():
+    for f in _random_curves(8, 7):
+        _gcd, _pairs = sing(f, 'gcd'), sing(f, 'pairs')
+        assert [str(s) for s in _gcd[0]] == [str(s) for s in _pairs[0]]
+        assert _gcd[1] == _pairs[1]
+
+def test_sing_gcd_pairs_known():
+    for e, p in [((y ** 2 - x ** 2 - 2) ** 2 + x ** 5, 7), ((y ** 2 - 2) ** 2 + (x ** 2 - 3) ** 3, 5), (x ** 3 + y ** 3 + x * y, 5)]:
+        f = poly(e, x, y, modulus=p)
+        _gcd, _pairs = sing(f, 'gcd'), sing(f, 'pairs')
+        assert len(_gcd[0]) > 0
+        assert [str(s) for s in _gcd[0]] == [str(s) for s in _pairs[0]]
+        assert _gcd[1] == _pairs[1]
+
+def test_sing_zero_resultant():
+    for e, p in [(y ** 2 - x ** 3, 3), (x ** 2 - 3 * x * y, 7), (y ** 3 - x ** 2, 3)]:
+        f = poly(e, x, y, modulus=p)
+        assert [str(s) for s in sing(f, 'gcd')[0]] == ['{x: 0, y: 0}']
+        assert [str(s) for s in sing(f, 'pairs')[0]] == ['{x: 0, y: 0}']
+        tree = resolve(f)
+        assert len(tree.children) == 1
+        assert tree.children[0].mult == 2
+
+def test_sing_multiple_component():
+    with pytest.raises(ValueError):
+        sing(poly((y - x) ** 2 * (y + x + 1), x, y, modulus=5))
+
+def test_sing_sweep_zero_resultant():
+    _table = sing_sweep(y ** 2 - x ** 3, 8)
+    assert sorted(_table) == [2, 3, 5, 7]
+    assert all([str(s) for s in _sing[0]] == ['{x: 0, y: 0}'] for _sing in _table.values())
+
+@pytest.mark.parametrize('e, delta', [
+    (y ** 2 - x ** 3, 1),
+    (y ** 2 - x ** 2 - x ** 3, 1),
+    (y ** 2 - x ** 4, 2),
+    (y ** 2 - x ** 5, 2),
+    (y ** 3 - x ** 3 - x ** 4, 3),
+    ((y ** 2 - x ** 3) * (y ** 2 - 2 * x ** 3), 8),
+])
+def test_delta(e, delta):
+    for p in [3, 5, 7, 11]:
+        assert local_expansion(poly(e, x, y, modulus=p), {x: 0, y: 0}).delta == delta
+
+def test_sing_sweep_per_prime():
+    for e in [y ** 2 - x ** 3 - x ** 2, y ** 3 - x ** 2 * y + 3 * x ** 4 + 2, x ** 3 + 4 * y ** 3 + x * y + 7]:
+        _table = sing_sweep(e, 14)
+        assert sorted(_table) == [2, 3, 5, 7, 11, 13]
+        for p, _sing in _table.items():
+            _expected = sing(poly(e, x, y, modulus=p))
+            assert [str(s) for s in _sing[0]] == [str(s) for s in _expected[0]]
+
+def test_sing_sweep_non_reduced():
+    _table = sing_sweep(y ** 2 + 5 * x ** 3 + 5 * x, 12)
+    assert sorted(_table) == [2, 3, 5, 7, 11]
+    assert _table[5] == 'non-reduced'
+    assert [str(s) for s in _table[2][0]] == ['{x: 1, y: 0}']
+
+def _curves():
+    return [y ** 2 - x ** 3 - x ** 2, x ** 3 + y ** 3 + x * y, (y ** 2 - 2) ** 2 + (x ** 2 - 3) ** 3, y ** 2 - x ** 5 - 1]
+
+def test_sing_many():
+    _settings = multiprocessingtools._pool_processes, multiprocessingtools._pool_threshold
+    try:
+        for workers in [1, 2]:
+            _results = dict(sing_many(_curves(), 5, workers))
+            assert sorted(_results) == [0, 1, 2, 3]
+            for i, e in enumerate(_curves()):
+                _expected = sing(poly(e, x, y, modulus=5))
+                assert [str(s) for s in _results[i][0]] == [str(s) for s in _expected[0]]
+                assert _results[i][1] == _expected[1]
+            assert (multiprocessingtools._pool_processes, multiprocessingtools._pool_threshold) == _settings
+    finally:
+        close_pool()
+
+def test_sing_many_stopped():
+    _settings = multiprocessingtools._pool_processes, multiprocessingtools._pool_threshold
+    _results = sing_many(_curves(), 7, 1)
+    next(_results)
+    assert multiprocessingtools._pool_processes == 1
+    _results.close()
+    assert (multiprocessingtools._pool_processes, multiprocessingtools._pool_threshold) == _settings
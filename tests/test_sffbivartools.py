@@ -0,0 +1,69 @@
+"""
+    Sparse bivariate polynomials against sympy over FF(p).
+"""
+import random
+
+from sympy.core.function import expand
+from sympy.core.symbol import symbols
+from sympy.polys.polytools import Poly
+
+from sffdomains import cached_sff, sff
+from sffbivartools import sffbivariate
+
+a, x, y = symbols('a x y')
+
+def _random_curve(n, p, rng):
+    return sum(rng.randrange(p) * x ** i * y ** j for i in range(n + 1) for j in range(n + 1 - i)) + x ** n
+
+def _same(f, e, p):
+    """ f equals the expression e over FF(p) """
+    return Poly(f.rep, x, y, modulus=p) == Poly(e, x, y, modulus=p)
+
+def test_arithmetic():
+    rng = random.Random(15)
+    for p in [2, 5]:
+        dom = cached_sff(0, p)
+        for n in range(1, 6):
+            e, e_ = _random_curve(n, p, rng), _random_curve(n + 1, p, rng)
+            f, g = sffbivariate(e, dom), sffbivariate(e_, dom)
+            assert _same(f + g, e + e_, p)
+            assert _same(f - g, e - e_, p)
+            assert _same(f * g, expand(e * e_), p)
+            assert _same(3 - f, 3 - e, p)
+
+def test_diff_subs():
+    rng = random.Random(16)
+    for p in [3, 7]:
+        dom = cached_sff(0, p)
+        for n in range(1, 7):
+            e = _random_curve(n, p, rng)
+            f = sffbivariate(e, dom)
+            assert _same(f.diff_x(), e.diff(x), p)
+            assert _same(f.diff_y(), e.diff(y), p)
+            c = rng.randrange(p)
+            assert Poly(f.subs_x(c).rep, y, modulus=p) == Poly(e.subs(x, c), y, modulus=p)
+            assert Poly(f.subs_y(c).rep, x, modulus=p) == Poly(e.subs(y, c), x, modulus=p)
+            assert f(c, 1).vec == dom.from_sympy(e.subs({x: c, y: 1}))
+
+def test_translate_blowup():
+    rng = random.Random(17)
+    for p in [3, 7]:
+        dom = cached_sff(0, p)
+        for n in range(1, 7):
+            e = _random_curve(n, p, rng)
+            f = sffbivariate(e, dom)
+            s, t = rng.randrange(p), rng.randrange(p)
+            assert _same(f.translate(s, t), expand(e.subs({x: x + s, y: y + t}, simultaneous=True)), p)
+            assert _same(f.swap(), e.subs({x: y, y: x}, simultaneous=True), p)
+            m = f.order()
+            assert _same(f.blowup_x(strict=False), expand(e.subs(y, x * y)), p)
+            assert _same(f.blowup_y(strict=False), expand(e.subs(x, x * y)), p)
+            assert _same(f.blowup_x() * sffbivariate(x ** m, dom), expand(e.subs(y, x * y)), p)
+
+def test_extension():
+    dom = sff(a ** 2 + 1, 3)
+    f = sffbivariate(y ** 2 - x ** 3 + a * x, dom)
+    g = f.translate(a, 1)
+    assert g.set_domain(dom) is g
+    assert f(a, 1) == g(0, 0)
+    assert sffbivariate(y ** 2 - x ** 3, cached_sff(0, 3)).set_domain(dom) == sffbivariate(y ** 2 - x ** 3, dom)
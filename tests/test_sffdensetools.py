@@ -0,0 +1,82 @@
+"""
+    Dense univariate kernels against their schoolbook counterparts.
+"""
+import random
+
+from sympy.core.function import expand
+from sympy.core.symbol import symbols
+from sympy.polys.polytools import Poly, rem
+
+import sffdensetools
+from sffdomains import cached_sff, sff
+from sffdensetools import dup_barrett, dup_divmod, dup_mul, dup_mul_classical, dup_mul_karatsuba, dup_mul_kronecker, dup_mullow, dup_rem, dup_rem_barrett, dup_rev_inverse, dup_strip
+from sffpolytools import sffpoly, simple_reduce
+
+a, b, x = symbols('a b x')
+
+def _domains():
+    return [cached_sff(0, 7), sff(a ** 2 + 1, 3), sff([a ** 2 + 1, b ** 3 + 2 * b + 1], 3)]
+
+def _random_dense(n, dom, rng):
+    return dup_strip([dom._index_to_vec(rng.randrange(dom.num)) for _ in range(n)])
+
+def _monic(n, dom, rng):
+    return [dom._index_to_vec(rng.randrange(dom.num)) for _ in range(n)] + [dom.one]
+
+def test_rev_inverse():
+    rng = random.Random(10)
+    for dom in _domains():
+        for n in range(1, 12):
+            g = _monic(rng.randrange(1, 8), dom, rng)
+            h = dup_rev_inverse(g, n, dom)
+            assert dup_mullow(g[::-1], h, n, dom) == [dom.one]
+
+def test_rem_barrett():
+    rng = random.Random(11)
+    for dom in _domains():
+        for d in range(1, 9):
+            g = _monic(d, dom, rng)
+            h = dup_barrett(g, dom)
+            for n in [0, d - 1, d, 2 * d - 2, 2 * d - 1, 3 * d]:
+                f = _random_dense(n + 1, dom, rng)
+                assert dup_rem_barrett(f, g, h, dom) == dup_rem(f, g, dom) == dup_divmod(f, g, dom)[1]
+
+def test_simple_reduce():
+    rel = {'var': a, 'rep': a ** 3 + 2 * a + 1, 'deg': 3}
+    for e in [a ** 7 + x * a ** 4, a ** 12 - 3 * a ** 5 + a, x ** 2 * a ** 3]:
+        _expected = rem(Poly(e, a, x), Poly(rel['rep'], a, x))
+        assert expand(simple_reduce(e, rel) - _expected.as_expr()) == 0
+
+def _factor_pairs(dom, rng):
+    for m, n in [(1, 1), (3, 5), (4, 4), (9, 2), (17, 13), (70, 65), (130, 70)]:
+        f, g = _random_dense(m, dom, rng), _random_dense(n, dom, rng)
+        if f and g:
+            yield f, g
+    yield [dom.zero, dom.zero, dom.one], [dom.one] + [dom.zero] * 6 + [dom.one]
+
+def test_kronecker():
+    rng = random.Random(12)
+    for dom in [cached_sff(0, 2), cached_sff(0, 101), sff(a ** 2 + 1, 3), sff(a ** 5 + 2 * a + 1, 7)]:
+        for f, g in _factor_pairs(dom, rng):
+            assert dup_mul_kronecker(f, g, dom) == dup_mul_classical(f, g, dom)
+
+def test_karatsuba(monkeypatch):
+    rng = random.Random(13)
+    for dom in _domains():
+        _pairs = list(_factor_pairs(dom, rng))
+        for f, g in _pairs:
+            assert dup_mul_karatsuba(f, g, dom) == dup_mul(f, g, dom) == dup_mul_classical(f, g, dom)
+        monkeypatch.setattr(sffdensetools, 'KARATSUBA_THRESHOLD', 2)
+        for f, g in _pairs:
+            assert dup_mul_karatsuba(f, g, dom) == dup_mul_classical(f, g, dom)
+        monkeypatch.undo()
+
+def test_sffpoly_mul():
+    rng = random.Random(14)
+    for p in [2, 7]:
+        dom = cached_sff(0, p)
+        for _ in range(8):
+            f = Poly([rng.randrange(p) for _ in range(rng.randrange(1, 30))] + [1], x, modulus=p)
+            g = Poly(x ** rng.randrange(40) + rng.randrange(p) * x ** rng.randrange(5) + 1, x, modulus=p)
+            for u, v in [(f, g), (f, f), (g, g)]:
+                assert Poly((sffpoly(u, dom) * sffpoly(v, dom)).rep, x, modulus=p) == u * v
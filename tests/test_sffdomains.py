@@ -0,0 +1,159 @@
+"""
+    Domains and the native arithmetic of their element vectors.
+"""
+import pytest
+
+from sympy.core.symbol import symbols
+
+from sffdomains import LRUCache, cached_sff, sff
+from sffelements import SFFElement
+from sffpolytools import reduce, sffpoly
+
+a, b, x = symbols('a b x')
+
+def _fields():
+    """ FF(9), FF(16) and FF(3**6) with two relations """
+    return [sff(a ** 2 + 1, 3), sff(a ** 4 + a + 1, 2), sff([a ** 2 + 1, b ** 3 + 2 * b + 1], 3)]
+
+def _elements(dom, count=None):
+    _step = 1 if count is None else max(1, dom.num // count)
+    return [dom._index_to_vec(i) for i in range(0, dom.num, _step)]
+
+def test_linear_relation():
+    dom = sff(a - 3, 5)
+    assert dom.dim == 1
+    assert dom.from_sympy(a) == (3,)
+    assert dom.from_sympy(a ** 3 + a) == (0,)
+    assert sffpoly(a * x + 1, dom) == sffpoly(3 * x + 1, dom)
+
+def test_linear_relation_with_extension():
+    dom = sff([a ** 2 + 2, b - 2], 5)
+    assert dom.dim == 2
+    assert dom.from_sympy(a * b ** 2) == dom.from_sympy(4 * a)
+
+def test_relation_not_univariate():
+    with pytest.raises(ValueError):
+        sff(a * b - 1, 5)
+
+def test_tables():
+    for dom in _fields():
+        dom.set_tables(True)
+        _vecs = _elements(dom, 40)
+        for u in _vecs:
+            for v in _vecs:
+                assert dom.mul(u, v) == dom._mul_vec(u, v)
+            for e in [0, 1, 2, 7, dom.num - 2, dom.num]:
+                assert dom.pow(u, e) == dom._pow_vec(u, e)
+        assert dom._exp is not None
+        assert sorted(dom._exp) == list(range(1, dom.num))
+
+def test_tables_off():
+    dom = sff(a ** 2 + 1, 3)
+    dom.set_tables(False)
+    u, v = dom.from_sympy(a + 1), dom.from_sympy(a - 1)
+    assert dom.mul(u, v) == dom.from_sympy(a ** 2 - 1) == dom.from_int(1)
+    assert dom._exp is None
+    with pytest.raises(ValueError):
+        sff(0, 7).set_tables(True)
+
+def test_frobenius():
+    for dom in _fields():
+        p = dom.mod
+        for u in _elements(dom, 60):
+            for k in range(dom.exdeg + 1):
+                assert dom.frobenius(u, k) == dom._pow_vec(u, p ** k)
+            assert dom.frobenius(u, dom.exdeg) == u
+        assert dom.frobenius(SFFElement(a, dom)).vec == dom._pow_vec(dom.from_sympy(a), p)
+        assert dom.frobenius(a) == dom.to_sympy(dom._pow_vec(dom.from_sympy(a), p))
+
+def test_conjugates():
+    dom = sff(a ** 4 + a + 1, 2)
+    _conj = dom.conjugates(a)
+    assert len(_conj) == 4 and len(set(_conj)) == 4
+    assert all(dom.from_sympy(c ** 4 + c + 1) == dom.zero for c in _conj)
+    assert dom.conjugates(1) == [1] * 4
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+    assert cache.get(1) == 'a'
+    cache.put(3, 'c')
+    assert cache.get(2) is None
+    assert cache.get(1) == 'a' and cache.get(3) == 'c'
+    assert cache.info() == {'hits': 3, 'misses': 1, 'size': 2, 'maxsize': 2}
+
+def test_reduce_memoized():
+    dom = sff(a ** 2 - 2, 5)
+    _info = dom.cache_info()
+    assert reduce(a ** 5 + 3 * a ** 2, dom) == 1 - a
+    assert dom.cache_info()['misses'] > _info['misses']
+    _hits = dom.cache_info()['hits']
+    assert reduce(a ** 5 + 3 * a ** 2, dom) == 1 - a
+    assert dom.cache_info()['hits'] == _hits + 1
+    dom.clear_cache()
+    assert dom.cache_info()['size'] == 0
+
+def test_cached_sff():
+    dom = cached_sff(a ** 2 - 2, 5)
+    assert cached_sff(2 * a ** 2 - 4, 5) is dom
+    assert cached_sff([a ** 2 - 2], 5) is dom
+    assert not cached_sff(a ** 2 - 3, 5) is dom
+
+def _order(dom, u):
+    k, v = 1, u
+    while not v == dom.one:
+        k, v = k + 1, dom._mul_vec(v, u)
+    return k
+
+def test_primitive_elements():
+    for dom in [sff(a ** 2 + 1, 3), sff(a ** 4 + a + 1, 2), sff(a ** 2 - 2, 5)]:
+        _expected = set(u for u in _elements(dom)[1:] if _order(dom, u) == dom.num - 1)
+        _found = [e.vec for e in dom.primitive_elements_iter()]
+        assert len(_found) == len(_expected)
+        assert set(_found) == _expected
+        assert all(dom.is_primitive_vec(u) == (u in _expected) for u in _elements(dom))
+        assert dom.primitive_element().vec in _expected
+
+def test_primitive_element_not_field():
+    with pytest.raises(ValueError):
+        sff(a ** 2 - 1, 5).primitive_element()
+
+def test_inv():
+    for dom in _fields() + [sff(0, 13)]:
+        dom.set_tables(False)
+        _vecs = _elements(dom, 200)[1:]
+        for u in _vecs:
+            assert dom._mul_vec(u, dom.inv(u)) == dom.one
+        assert dom.batch_inv(_vecs) == [dom.inv(u) for u in _vecs]
+        with pytest.raises(ZeroDivisionError):
+            dom.inv(dom.zero)
+        with pytest.raises(ZeroDivisionError):
+            dom.batch_inv([dom.one, dom.zero])
+
+def test_inv_not_field():
+    dom = sff(a ** 2 - 1, 5)
+    dom.set_tables(False)
+    with pytest.raises(ZeroDivisionError):
+        dom.inv(dom.from_sympy(a - 1))
+    assert dom._mul_vec(dom.from_sympy(a + 2), dom.inv(dom.from_sympy(a + 2))) == dom.one
+
+def test_gray_points_iter():
+    for dom, n in [(sff(0, 5), 3), (sff(a ** 2 + 1, 3), 2), (sff(a ** 3 + a + 1, 2), 2)]:
+        _points = list(dom.gray_points_iter(n))
+        assert len(_points) == dom.num ** n
+        assert set(_points) == set(dom.point_vec(n, i) for i in range(dom.num ** n))
+        for u, v in zip(_points, _points[1:]):
+            _diff = [(k, t) for k in range(n) for t in range(dom.dim) if not u[k][t] == v[k][t]]
+            assert len(_diff) == 1
+            k, t = _diff[0]
+            assert (v[k][t] - u[k][t]) % dom.mod == 1
+        assert all(dom.gray_point(n, i) == point for i, point in enumerate(_points))
+        _slices = [list(dom.gray_points_iter(n, start, start + 7)) for start in range(0, dom.num ** n, 7)]
+        assert [point for _slice in _slices for point in _slice] == _points
+        assert list(dom.gray_points_iter(n, 5, 5)) == []
+
+def test_gray_elements_iter():
+    dom = sff(a ** 2 + 1, 3)
+    assert sorted(dom.gray_elements_iter()) == sorted(_elements(dom))
+    assert list(dom.gray_elements_iter(2, 4)) == [point[0] for point in dom.gray_points_iter(1, 2, 4)]
@@ -0,0 +1,79 @@
+"""
+    Batch evaluation with NumPy and compiled evaluators against term-wise evaluation.
+"""
+import random
+
+import pytest
+
+from sympy.core.symbol import symbols
+
+from sffdomains import cached_sff, sff
+from sffpolytools import sffpoly
+from sffevaltools import np, batch_eval, batch_points, zero_mask, zero_mask_chunks
+
+a, x, y, z = symbols('a x y z')
+
+def _eval(f, point):
+    """ value of f at point term by term """
+    dom = f.dom
+    _val = dom.zero
+    for e, c in f.terms.items():
+        for u, k in zip(point, e):
+            c = dom.mul(c, dom.pow(u, k))
+        _val = dom.add(_val, c)
+    return _val
+
+def _random_sffpoly(var, deg, dom, rng):
+    _expr = 0
+    for _ in range(6):
+        _term = dom.to_sympy(dom._index_to_vec(rng.randrange(dom.num)))
+        for v in var:
+            _term *= v ** rng.randrange(deg + 1)
+        _expr += _term
+    return sffpoly(_expr + var[0], dom)
+
+def _domains():
+    return [cached_sff(0, 7), sff(a ** 2 + 1, 3), sff(a ** 3 + a + 1, 2)]
+
+@pytest.mark.skipif(np is None, reason="needs numpy")
+def test_zero_mask():
+    rng = random.Random(8)
+    for dom in _domains():
+        for var in [[x], [x, y], [x, y, z]]:
+            f = _random_sffpoly(var, 4, dom, rng)
+            n = len(var)
+            _points = [dom.point_vec(n, i) for i in range(dom.num ** n)]
+            _mask = zero_mask(f)
+            assert list(_mask) == [not any(_eval(f, point)) for point in _points]
+            _vals = batch_eval(f, batch_points(0, len(_points), n, dom))
+            assert [tuple(int(c) for c in v) for v in _vals] == [_eval(f, point) for point in _points]
+            _chunks = np.concatenate([mask for start, mask in zero_mask_chunks(f, 5)])
+            assert (_chunks == _mask).all()
+            assert (zero_mask(f, 3, 11) == _mask[3:11]).all()
+
+def _eval_in(f, var, point):
+    """ value at point of f, whose variables are among var """
+    return _eval(f, [point[var.index(v)] for v in f.var])
+
+def test_compile_partials():
+    rng = random.Random(9)
+    for dom in _domains():
+        for var in [[x], [x, y], [x, y, z]]:
+            f = _random_sffpoly(var, 5, dom, rng)
+            ev = f.compile()
+            _diffs = [f.diff(v) for v in var]
+            for _ in range(20):
+                point = [dom._index_to_vec(rng.randrange(dom.num)) for v in var]
+                _val, _grad = ev.eval_with_partials_vec(point)
+                assert _val == ev.eval_vec(point) == _eval(f, point)
+                assert _grad == [_eval_in(g, var, point) for g in _diffs]
+                assert ev(dict(zip(var, point))).vec == _val
+            assert ev.batch([point], partials=False) == [_val]
+
+def test_is_singular():
+    dom = cached_sff(0, 7)
+    ev = sffpoly(y ** 2 - x ** 3 - x ** 2, dom).compile()
+    assert ev.is_singular({x: 0, y: 0})
+    assert not ev.is_singular({x: -1, y: 0})
+    with pytest.raises(ValueError):
+        ev({x: 0})
@@ -0,0 +1,116 @@
+"""
+    Factorization and resultants of sffpolys against sympy.
+"""
+import random
+
+from sympy.core.symbol import symbols
+from sympy.polys.polytools import Poly, gcd
+
+import sffdensetools
+
+from sffdomains import cached_sff, sff
+from sffpolytools import sffpoly
+from sfffacttools import sfffactor_list, sffgcd, sffgcdex, sffinvert, sffresultant
+
+x, y = symbols('x y')
+
+def _random_poly(n, p, rng):
+    return Poly([rng.randrange(1, p)] + [rng.randrange(p) for _ in range(n)], x, modulus=p)
+
+def _random_curve(n, p, rng):
+    return Poly(sum(rng.randrange(p) * x ** i * y ** j for i in range(n + 1) for j in range(n + 1 - i)), x, y, modulus=p)
+
+def _expand(lc, factors, p):
+    _prod = Poly(lc.rep, x, modulus=p)
+    for g, m in factors:
+        _prod *= Poly(g.rep, x, modulus=p) ** m
+    return _prod
+
+def test_sfffactor_list_prime():
+    rng = random.Random(1)
+    for p in [2, 3, 5, 7, 13]:
+        for n in range(1, 13):
+            f = _random_poly(n, p, rng)
+            lc, factors = sfffactor_list(sffpoly(f, cached_sff(0, p)))
+            assert _expand(lc, factors, p) == f
+            assert all(Poly(g.rep, x, modulus=p).is_irreducible for g, m in factors)
+
+def test_sfffactor_list_repeated():
+    for p in [2, 3, 5]:
+        f = Poly((x + 1) ** p * (x ** 2 + x - 1) ** 2 * x, x, modulus=p)
+        lc, factors = sfffactor_list(sffpoly(f, cached_sff(0, p)))
+        assert _expand(lc, factors, p) == f
+        assert all(Poly(g.rep, x, modulus=p).is_irreducible for g, m in factors)
+
+def test_sfffactor_list_extension():
+    a = symbols('a')
+    dom = sff(a ** 2 + a + 2, 3)
+    rng = random.Random(2)
+    for n in range(1, 9):
+        f = sffpoly(_random_poly(n, 3, rng).as_expr() + a * x, dom)
+        lc, factors = sfffactor_list(f)
+        _prod = lc
+        for g, m in factors:
+            _prod = _prod * g ** m
+        assert _prod == f
+
+def test_sffresultant():
+    rng = random.Random(3)
+    for p in [2, 3, 5, 7]:
+        dom = cached_sff(0, p)
+        for n in range(1, 6):
+            f, g = _random_curve(n, p, rng), _random_curve(rng.randrange(1, 5), p, rng)
+            if f.degree(y) < 1 or g.degree(y) < 1:
+                continue
+            _res = sffresultant(sffpoly(f, dom), sffpoly(g, dom), y)
+            _expected = Poly(f.as_expr(), y, x, modulus=p).resultant(Poly(g.as_expr(), y, x, modulus=p))
+            assert Poly(_res.rep, x, modulus=p) == Poly(_expected.as_expr(), x, modulus=p)
+
+def test_sffresultant_partials():
+    for p in [2, 3, 5, 7]:
+        dom = cached_sff(0, p)
+        for e in [y ** 2 - x ** 3, y ** 3 - x ** 2 * y + x, (y ** 2 - x ** 2 - 2) ** 2 + x ** 5]:
+            f = Poly(e, x, y, modulus=p)
+            F = sffpoly(f, dom)
+            _res = sffresultant(F, F.diff(x), y)
+            _expected = Poly(e, y, x, modulus=p).resultant(Poly(e.diff(x), y, x, modulus=p))
+            assert Poly(_res.rep, x, modulus=p) == Poly(_expected.as_expr(), x, modulus=p)
+
+def _random_gcd_pair(n, p, rng):
+    h = _random_poly(rng.randrange(n), p, rng)
+    return _random_poly(n, p, rng) * h, _random_poly(n - 1, p, rng) * h
+
+def test_sffgcd():
+    rng = random.Random(5)
+    for p in [2, 3, 7]:
+        dom = cached_sff(0, p)
+        for n in range(1, 12):
+            f, g = _random_gcd_pair(n, p, rng)
+            _gcd = sffgcd(sffpoly(f, dom), sffpoly(g, dom))
+            assert Poly(_gcd.rep, x, modulus=p) == gcd(f, g).monic()
+
+def test_sffgcdex():
+    rng = random.Random(6)
+    a = symbols('a')
+    for dom in [cached_sff(0, 5), sff(a ** 2 + 1, 3)]:
+        for n in range(1, 10):
+            f, g = [sffpoly(h.as_expr(), dom) for h in _random_gcd_pair(n, dom.mod, rng)]
+            s, t, h = sffgcdex(f, g)
+            assert s * f + t * g == h
+            assert h == sffgcd(f, g)
+
+def test_sffinvert():
+    dom = cached_sff(0, 7)
+    f, g = sffpoly(x ** 3 + 2 * x + 1, dom), sffpoly(x ** 5 + 3, dom)
+    assert (f * sffinvert(f, g)) % g == 1
+
+def test_half_gcd(monkeypatch):
+    rng = random.Random(7)
+    dom = cached_sff(0, 5)
+    _pairs = [(sffpoly(f, dom), sffpoly(g, dom)) for f, g in [_random_gcd_pair(40, 5, rng) for _ in range(4)]]
+    _classical = [sffgcd(f, g) for f, g in _pairs]
+    monkeypatch.setattr(sffdensetools, 'HGCD_THRESHOLD', 4)
+    for (f, g), h in zip(_pairs, _classical):
+        assert sffgcd(f, g) == h
+        s, t, h_ = sffgcdex(f, g)
+        assert s * f + t * g == h_ == h
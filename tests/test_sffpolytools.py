@@ -0,0 +1,117 @@
+"""
+    Arithmetic of sffpolys and sffquotientpolys against sympy over FF(p).
+"""
+import random
+from itertools import islice
+
+from sympy.core.function import expand
+from sympy.core.numbers import Integer
+from sympy.core.symbol import symbols
+from sympy.polys.polytools import Poly, rem
+
+from sffdomains import cached_sff, sff
+from sffdensetools import dup_divmod, dup_eval, dup_mul, dup_strip
+import sffpolytools
+from sffpolytools import SFFPoly, sffpoly, sffquotientpoly
+from multiprocessingtools import close_pool, pool_settings
+
+a, x, y = symbols('a x y')
+
+def _random_dense(n, dom, rng):
+    return [dom._index_to_vec(rng.randrange(dom.num)) for _ in range(n)] + [dom.one]
+
+def _multiplicity(f, r, dom):
+    """ multiplicity of the root r of the dense f by repeated division """
+    m, _lin = 0, [dom.neg(r), dom.one]
+    while True:
+        _quo, _rem = dup_divmod(f, _lin, dom)
+        if dup_strip(_rem):
+            return m
+        f, m = _quo, m + 1
+
+def test_quotient_pow_multivariate():
+    for e, q, gens, p in [(x * y + x ** 2 + 1, x ** 3 - 2, (x, y), 5), (x * y ** 2 + x ** 2 + y, y ** 2 + y - 1, (y, x), 7)]:
+        dom = cached_sff(0, p)
+        f = sffquotientpoly(e, dom, q)
+        for n in [2, 3, 5, 8]:
+            _expected = rem(Poly(expand(e ** n), *gens, modulus=p), Poly(q, *gens, modulus=p))
+            assert sffpoly(f ** n, dom) == sffpoly(_expected.as_expr(), dom)
+
+def test_pow_integer_exponent():
+    dom = cached_sff(0, 7)
+    f = sffpoly(x ** 2 + 3 * x * y + 1, dom)
+    assert f ** Integer(3) == f * f * f
+    g = sffquotientpoly(x ** 2 + 3 * x + 1, dom, x ** 2 - 3)
+    assert g ** Integer(3) == g * g * g
+
+def test_pow_pool():
+    dom = cached_sff(0, 7)
+    f = sffpoly(x ** 2 + 3 * x * y + 1, dom)
+    g = sffquotientpoly(x ** 2 + 3 * x + 1, dom, x ** 3 - 3)
+    _f, _g = f ** 13, g ** 13
+    try:
+        with pool_settings(2, 0):
+            assert f ** 13 == _f
+            assert g ** 13 == _g
+    finally:
+        close_pool()
+
+def test_roots():
+    rng = random.Random(4)
+    for dom in [cached_sff(0, 7), sff(a ** 2 + 1, 3), sff(a ** 3 + a + 1, 2)]:
+        for n in range(1, 9):
+            _dense = _random_dense(n, dom, rng)
+            if n % 3 == 0:
+                _lin = [dom._index_to_vec(rng.randrange(dom.num)), dom.one]
+                _dense = dup_mul(dup_mul(_dense, _lin, dom), _lin, dom)
+            f = SFFPoly.from_dense(_dense, x, dom)
+            _zeros = [u for u in map(dom._index_to_vec, range(dom.num)) if not any(dup_eval(_dense, u, dom))]
+            assert [r.vec for r, m in f.roots()] == _zeros
+            assert all(m == _multiplicity(_dense, r.vec, dom) for r, m in f.roots())
+            assert f.has_roots() == bool(_zeros)
+
+def _zeros(f):
+    """ zeros of f at every point, in the order of SFF.point_vec """
+    n, dom = len(f.var), f.dom
+    _points = [dom.point_vec(n, i) for i in range(dom.num ** n)]
+    return [f._point_as_dict(point) for point in _points if f._subs(dict(zip(f.var, point))).terms == {}]
+
+def _counting_chunks(monkeypatch):
+    _calls = []
+    _solve_chunk = sffpolytools._solve_chunk
+    def _counted(f, start, stop):
+        _calls.append(start)
+        return _solve_chunk(f, start, stop)
+    monkeypatch.setattr(sffpolytools, '_solve_chunk', _counted)
+    return _calls
+
+def test_solve(monkeypatch):
+    for f in [sffpoly(y ** 2 - x ** 3 - 1, cached_sff(0, 7)), sffpoly(x * y - a, sff(a ** 2 + 1, 3)), sffpoly(x ** 2 + y ** 2 + 3, cached_sff(0, 11))]:
+        _expected = _zeros(f)
+        assert f.solve() == _expected
+        assert f.solve(chunk=7) == _expected
+        monkeypatch.setattr(sffpolytools, 'np', None)
+        assert f.solve(chunk=7) == _expected
+        monkeypatch.undo()
+
+def test_solve_bound(monkeypatch):
+    f = sffpoly(x ** 2 + y ** 2 + 3, cached_sff(0, 11))
+    _calls = _counting_chunks(monkeypatch)
+    _sol = f.solve(bound=2, chunk=11)
+    assert len(_sol) == 2
+    assert all(s in _zeros(f) for s in _sol)
+    assert len(_calls) < 11
+
+def test_iter_solutions(monkeypatch):
+    f = sffpoly(x ** 2 + y ** 2 + 3, cached_sff(0, 11))
+    _expected = _zeros(f)
+    _all = list(f.iter_solutions(chunk=11))
+    assert sorted(_all, key=str) == sorted(_expected, key=str)
+    _calls = _counting_chunks(monkeypatch)
+    _first = list(islice(f.iter_solutions(chunk=11), 1))
+    assert len(_first) == 1 and _first[0] in _expected
+    assert len(_calls) < 11
+
+def test_iter_solutions_univariate():
+    f = sffpoly(x ** 3 - x, cached_sff(0, 7))
+    assert list(f.iter_solutions()) == f.solve() == [{x: 0}, {x: 1}, {x: -1}]